@@ -0,0 +1,68 @@
+"""Асинхронные представления страниц для чтения, для работы под ASGI.
+
+ORM в Django 3.2 синхронный, а представления на классах асинхронными
+быть не умеют, поэтому здесь асинхронная только точка входа: проверка
+ETag, кэш страниц, запросы и рендеринг шаблона выполняются одним вызовом
+sync_to_async, пока цикл событий обслуживает другие соединения. Один
+переход в поток на запрос дешевле, чем sync_to_async вокруг каждого
+запроса к базе.
+
+Страницы только читают, поэтому вызов не thread_sensitive и запросы идут
+параллельно в пуле потоков, а не по очереди в общем потоке синхронного
+кода. У каждого потока пула свои соединения: их, как и обработчик
+запроса, закрывает close_old_connections по CONN_MAX_AGE, а запросы в
+них считает QueryBudgetMiddleware через track_queries.
+"""
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from . import views
+from .middleware import track_queries
+
+
+class AsyncViewMixin:
+    """Делает из представления на классах асинхронную функцию."""
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        def render_view(request, *args, **kwargs):
+            close_old_connections()
+            try:
+                with track_queries():
+                    response = view(request, *args, **kwargs)
+                    # Иначе Django отрендерит шаблон ещё одним переходом
+                    # в поток.
+                    if (hasattr(response, 'render')
+                            and callable(response.render)):
+                        response.render()
+            finally:
+                close_old_connections()
+            return response
+
+        run_in_thread = sync_to_async(render_view, thread_sensitive=False)
+
+        async def async_view(request, *args, **kwargs):
+            return await run_in_thread(request, *args, **kwargs)
+
+        update_wrapper(async_view, view)
+        return async_view
+
+
+class PostListView(AsyncViewMixin, views.PostListView):
+    pass
+
+
+class CategoryListView(AsyncViewMixin, views.CategoryListView):
+    pass
+
+
+class PostDetailView(AsyncViewMixin, views.PostDetailView):
+    pass
+
+
+class UserListView(AsyncViewMixin, views.UserListView):
+    pass
@@ -0,0 +1,81 @@
+"""Общие помощники для команд замера производительности."""
+import json
+import math
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+
+
+def percentile(values, fraction):
+    """Перцентиль методом ближайшего ранга; values уже отсортированы."""
+    if not values:
+        return None
+    rank = max(0, min(len(values) - 1, math.ceil(fraction * len(values)) - 1))
+    return values[rank]
+
+
+def summarize(durations):
+    """Сводка по длительностям в секундах, в миллисекундах."""
+    values = sorted(duration * 1000 for duration in durations)
+    return {
+        'count': len(values),
+        'mean_ms': round(statistics.fmean(values), 3) if values else None,
+        'p50_ms': round(percentile(values, 0.50), 3) if values else None,
+        'p95_ms': round(percentile(values, 0.95), 3) if values else None,
+        'p99_ms': round(percentile(values, 0.99), 3) if values else None,
+        'max_ms': round(values[-1], 3) if values else None,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def default_report_path(name):
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    revision = git_revision() or 'nogit'
+    return (
+        settings.BASE_DIR / 'bench_results'
+        / f'{name}-{stamp}-{revision}.json')
+
+
+def write_report(path, benchmark, results, **meta):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        'benchmark': benchmark,
+        'revision': git_revision(),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        **meta,
+        'results': results,
+    }
+    path.write_text(
+        json.dumps(report, ensure_ascii=False, indent=2), encoding='utf-8')
+    return path
+
+
+def compare_reports(baseline, results, metrics=('p50_ms', 'p95_ms')):
+    """Строки «было → стало» для совпадающих ключей двух отчётов."""
+    previous = json.loads(Path(baseline).read_text(encoding='utf-8'))
+    lines = []
+    for key, current in results.items():
+        before = previous['results'].get(key)
+        if not before:
+            continue
+        changes = []
+        for metric in metrics:
+            old, new = before.get(metric), current.get(metric)
+            if old and new is not None:
+                changes.append(
+                    f'{metric} {old} → {new} ({(new - old) / old:+.0%})')
+        lines.append(f'{key}: ' + ', '.join(changes))
+    return lines
@@ -0,0 +1,110 @@
+"""Условные GET-запросы: ETag и Last-Modified для страниц блога.
+
+Валидаторы складываются из поколений групп кэша страниц, которые
+меняются при любой правке поста, комментария, категории или автора,
+и из самых новых дат страницы, которые вычисляет одним запросом
+get_newest_timestamps(). Даты нужны для отложенных постов: такой пост
+появляется в ленте с течением времени, без сброса поколений. Результат
+запроса хранится в кэше до ближайшей отложенной публикации, так что
+повторная проверка обычно не трогает базу, а ответ 304 отдаётся до
+выборки постов и рендеринга шаблона. В кэше одного процесса поколения и
+даты живут не дольше PAGE_CACHE_LOCAL_TIMEOUT, см. blog.page_cache.
+"""
+import hashlib
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from . import page_cache
+from .utils import get_publication_boundary, publication_timeout
+
+NOT_MODIFIED = 'not_modified'
+FULL = 'full'
+
+stats = Counter()
+
+
+def record(view_name, outcome):
+    if getattr(settings, 'CONDITIONAL_GET_STATS', False):
+        stats[(view_name, outcome)] += 1
+
+
+def not_modified_rates():
+    """Доля ответов 304 по маршрутам."""
+    totals = Counter()
+    for (view_name, _), count in stats.items():
+        totals[view_name] += count
+    return {
+        view_name: stats[(view_name, NOT_MODIFIED)] / total
+        for view_name, total in totals.items()
+    }
+
+
+def _from_generation(generation):
+    return datetime.fromtimestamp(generation / 1e9, tz=timezone.utc)
+
+
+class ConditionalGetMixin:
+    """Отдаёт 304, если у клиента актуальная копия страницы.
+
+    Нужны page_cache_groups из AnonymousPageCacheMixin. Страницам, где
+    со временем появляются отложенные посты, нужен и свой
+    get_newest_timestamps() — один небольшой запрос за датами; без него
+    страница меняется только вместе с поколениями.
+    """
+
+    def get_newest_timestamps(self):
+        return []
+
+    def get_validator_scope(self):
+        # Что, кроме маршрута, влияет на результат get_newest_timestamps.
+        return sorted(self.kwargs.items())
+
+    def get_newest_timestamp(self, view_name, generations):
+        scope = repr((view_name, self.get_validator_scope(), generations))
+        key = 'blog-validators:' + hashlib.md5(scope.encode()).hexdigest()
+        cache = page_cache.get_cache()
+        cached = cache.get(key)
+        if cached is not None:
+            return cached[0]
+        newest = max(filter(None, self.get_newest_timestamps()), default=None)
+        cache.set(key, (newest,), page_cache.cache_timeout(publication_timeout(
+            settings.PAGE_CACHE_TIMEOUT, get_publication_boundary())))
+        return newest
+
+    def get_validators(self, request):
+        view_name = request.resolver_match.view_name
+        generations = page_cache.get_generations(
+            self.get_page_cache_groups())
+        newest = self.get_newest_timestamp(view_name, generations)
+        last_modified = max(
+            filter(None, [newest, _from_generation(max(generations))]))
+        # Секрет CSRF меняется при входе: страница, сохранённая до выхода,
+        # несёт в формах старый токен и не должна считаться актуальной.
+        fingerprint = repr((
+            generations, newest, request.user.pk,
+            request.META.get('CSRF_COOKIE')))
+        # Слабый ETag: маска csrf-токена меняется от ответа к ответу.
+        etag = 'W/' + quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+        return etag, int(last_modified.timestamp())
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        view_name = request.resolver_match.view_name
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            if response.status_code == 304:
+                record(view_name, NOT_MODIFIED)
+            return response
+        record(view_name, FULL)
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        return response
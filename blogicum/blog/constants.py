@@ -9,3 +9,50 @@ MAX_LENGTH_CHAR_FIELD_COMMENT = 250
 # Maximum char field length in model for comment
 
 POST_LIMIT = 5
+
+RECOUNT_BATCH_SIZE = 500
+# Number of posts repaired per UPDATE when recounting comments
+
+PUBLICATION_BOUNDARY_CACHE_KEY = 'blog:publication-boundary'
+# Cache key of the next scheduled publication moment
+
+PUBLICATION_BOUNDARY_MAX_AGE = 60 * 60
+# Upper bound, in seconds, for trusting a cached publication boundary
+
+IMAGE_VARIANT_WIDTHS = (320, 640, 960)
+# Widths, in pixels, of the downscaled copies generated for Post.image
+
+IMAGE_VARIANT_QUALITY = 82
+# JPEG quality of the generated image copies
+
+EXPORT_CHUNK_SIZE = 2000
+# Rows fetched from the database per round trip when streaming an export
+
+IMPORT_BATCH_SIZE = 2000
+# Objects inserted per bulk_create call and transaction by bulk_import
+
+IMPORT_READ_SIZE = 1 << 16
+# Characters read from the fixture file at a time while streaming it
+
+SEARCH_CANDIDATES = 1000
+# Only this many newest published matches are ranked, which bounds search
+# time; the search page says when older matches were left out
+
+SEARCH_SNIPPET_TOKENS = 32
+# Length, in tokens, of the text fragment shown for each search result
+
+LOOKUP_VERSION_CACHE_KEY = 'blog:lookup-version'
+# Cache key of the version of the in-process category and location tables
+
+COMMENTS_PAGE_SIZE = 50
+# Comments rendered with the post and fetched per "show more" request
+
+STATIC_COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.json', '.map', '.txt', '.xml', '.ico')
+# Collected static files that get precompressed .gz and .br copies
+
+STATIC_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+# Seconds browsers may cache a static file whose name carries its hash
+
+STATIC_MAX_AGE = 60
+# Seconds browsers may cache a static file requested by its plain name
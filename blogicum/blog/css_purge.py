@@ -0,0 +1,152 @@
+"""Удаление из CSS правил для классов, которых нет в шаблонах.
+
+Классы ищутся как слова во всех шаблонах, в JavaScript из STATICFILES_DIRS
+и в исходниках приложений (django_bootstrap5 собирает часть классов в
+Python). Правило остаётся, если хотя бы у одного его селектора все классы
+встречаются среди этих слов или подходят под STATIC_PURGE_SAFELIST.
+Правила без классов, @font-face и @keyframes не трогаются, блоки @media и
+@supports чистятся изнутри. Комментарии /*! ... */ с лицензией остаются.
+"""
+import re
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.template import engines
+from django.template.utils import get_app_template_dirs
+
+TOKEN_RE = re.compile(r'[\w-]+')
+CLASS_RE = re.compile(r'\.((?:\\.|[\w-])+)')
+IGNORED_RE = re.compile(r':not\([^)]*\)|\[[^\]]*\]')
+COMMENT_RE = re.compile(r'/\*.*?\*/', re.S)
+NESTED_AT_RULE_RE = re.compile(r'@(?:media|supports)\b')
+
+
+def content_paths():
+    directories = [
+        *(directory for engine in engines.all() for directory in engine.dirs),
+        *get_app_template_dirs('templates'),
+        *get_app_template_dirs('jinja2'),
+    ]
+    for directory in directories:
+        yield from Path(directory).rglob('*.html')
+    for directory in settings.STATICFILES_DIRS:
+        yield from Path(directory).rglob('*.js')
+    for app_config in apps.get_app_configs():
+        yield from Path(app_config.path).rglob('*.py')
+
+
+def used_tokens(paths=None):
+    tokens = set()
+    for path in content_paths() if paths is None else paths:
+        tokens.update(TOKEN_RE.findall(
+            Path(path).read_text(encoding='utf-8', errors='ignore')))
+    return tokens
+
+
+def _skip(css, i):
+    """Позиция после комментария или строки, начинающихся в i."""
+    if css.startswith('/*', i):
+        end = css.find('*/', i + 2)
+        return len(css) if end == -1 else end + 2
+    quote = css[i]
+    i += 1
+    while i < len(css) and css[i] != quote:
+        i += 2 if css[i] == '\\' else 1
+    return i + 1
+
+
+def _find(css, i, stops):
+    while i < len(css):
+        if css.startswith('/*', i) or css[i] in '"\'':
+            i = _skip(css, i)
+        elif css[i] in stops:
+            return i
+        else:
+            i += 1
+    return len(css)
+
+
+def _closing_brace(css, i):
+    depth = 0
+    while i < len(css):
+        i = _find(css, i, '{}')
+        if i == len(css):
+            return i
+        depth += 1 if css[i] == '{' else -1
+        if not depth:
+            return i
+        i += 1
+    return i
+
+
+def _split_selectors(prelude):
+    selectors, depth, start = [], 0, 0
+    for i, char in enumerate(prelude):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and not depth:
+            selectors.append(prelude[start:i])
+            start = i + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+class Purger:
+    """Чистит таблицу стилей по набору встречающихся слов."""
+
+    def __init__(self, used, safelist=()):
+        self.used = used
+        self.safelist = [re.compile(pattern) for pattern in safelist]
+
+    def is_used(self, css_class):
+        css_class = css_class.replace('\\', '')
+        return css_class in self.used or any(
+            pattern.search(css_class) for pattern in self.safelist)
+
+    def keeps(self, selector):
+        return all(
+            self.is_used(css_class)
+            for css_class in CLASS_RE.findall(IGNORED_RE.sub('', selector)))
+
+    def purge(self, css):
+        output = []
+        i = 0
+        while i < len(css):
+            brace = _find(css, i, '{;')
+            if brace == len(css) or css[brace] == ';':
+                output.append(css[i:brace + 1])
+                i = brace + 1
+                continue
+            end = _closing_brace(css, brace)
+            prelude, body = css[i:brace], css[brace + 1:end]
+            licenses = ''.join(
+                comment for comment in COMMENT_RE.findall(prelude)
+                if comment.startswith('/*!'))
+            prelude = COMMENT_RE.sub('', prelude)
+            if NESTED_AT_RULE_RE.match(prelude.strip()):
+                body = self.purge(body)
+                if body.strip():
+                    output.append(f'{licenses}{prelude}{{{body}}}')
+            elif prelude.strip().startswith('@'):
+                output.append(f'{licenses}{prelude}{{{body}}}')
+            else:
+                selectors = [
+                    selector for selector in _split_selectors(prelude)
+                    if self.keeps(selector)]
+                if selectors:
+                    output.append(f'{licenses}{",".join(selectors)}{{{body}}}')
+                else:
+                    output.append(licenses)
+            i = end + 1
+        return ''.join(output)
+
+
+def purge_css(css, used=None, safelist=None):
+    if used is None:
+        used = used_tokens()
+    if safelist is None:
+        safelist = settings.STATIC_PURGE_SAFELIST
+    return Purger(used, safelist).purge(css)
@@ -0,0 +1,57 @@
+"""Настройка SQLite под конкурентную нагрузку.
+
+Параметры PRAGMA из settings.SQLITE_PRAGMAS применяются к каждому новому
+соединению. WAL позволяет читать во время записи, busy_timeout заставляет
+ждать блокировку, а не сразу падать. Отложенная транзакция, начавшая
+с чтения, всё равно может получить «database is locked» при переходе
+к записи — такие записи повторяет retry_on_locked.
+"""
+import functools
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    # Мимо обёрток Django: PRAGMA не должны попадать в счётчики запросов.
+    raw = connection.connection
+    for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+        raw.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked_error(error):
+    return 'database is locked' in str(error)
+
+
+def retry_on_locked(func):
+    """Повторяет запись, если SQLite ответил «database is locked».
+
+    Каждая попытка выполняется в своей транзакции: запись и то, что
+    делают её сигналы, откатываются вместе, и повтор не продублирует
+    уже сохранённое. Внутри внешней транзакции повтор невозможен —
+    ошибка пробрасывается.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        attempts = settings.SQLITE_LOCK_RETRIES
+        for attempt in range(attempts + 1):
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as e:
+                if (not is_locked_error(e) or attempt == attempts
+                        or connection.in_atomic_block):
+                    raise
+                delay = settings.SQLITE_LOCK_RETRY_DELAY * 2 ** attempt
+                logger.warning(
+                    '%s: база занята, повтор через %.3f с',
+                    func.__qualname__, delay)
+                time.sleep(delay * random.uniform(0.5, 1.5))
+    return wrapper
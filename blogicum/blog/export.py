@@ -0,0 +1,56 @@
+"""Построчная выгрузка постов и комментариев в NDJSON.
+
+Строки читаются из базы порциями через iterator() и сразу сериализуются,
+поэтому память не растёт с размером таблицы. Порядок — по id, так что
+последний выгруженный id годится как отметка для следующей выгрузки.
+"""
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .constants import EXPORT_CHUNK_SIZE
+from .models import Comment, Post
+
+EXPORT_FIELDS = {
+    'posts': (Post, (
+        'id', 'title', 'text', 'pub_date', 'created_at', 'is_published',
+        'image', 'comment_count',
+        'author_id', 'author__username',
+        'category_id', 'category__slug', 'category__title',
+        'location_id', 'location__name',
+    )),
+    'comments': (Comment, (
+        'id', 'post_id', 'text', 'created_at',
+        'author_id', 'author__username',
+    )),
+}
+
+
+def parse_watermark(since_id=None, since=None):
+    """Приводит отметки из запроса или командной строки к фильтрам."""
+    filters = {}
+    if since_id not in (None, ''):
+        filters['id__gt'] = int(since_id)
+    if since not in (None, ''):
+        moment = parse_datetime(since)
+        if moment is None:
+            raise ValueError(f'Неверная дата: {since}')
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        filters['created_at__gt'] = moment
+    return filters
+
+
+def export_rows(kind, **filters):
+    model, fields = EXPORT_FIELDS[kind]
+    rows = model.objects.filter(**filters).order_by('id').values(*fields)
+    return rows.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def ndjson_lines(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(
+            {key.replace('__', '_'): value for key, value in row.items()}
+        ) + '\n'
@@ -0,0 +1,52 @@
+"""Уменьшенные копии Post.image для srcset."""
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from . import page_cache
+from .constants import IMAGE_VARIANT_QUALITY, IMAGE_VARIANT_WIDTHS
+from .models import Post
+
+
+def variant_name(name, width):
+    stem, _ = os.path.splitext(name)
+    return f'{stem}_w{width}.jpg'
+
+
+def variant_widths(original_width):
+    return [width for width in IMAGE_VARIANT_WIDTHS if width < original_width]
+
+
+def _render_variant(image, width):
+    height = round(image.height * width / image.width)
+    buffer = BytesIO()
+    image.resize((width, height), Image.Resampling.LANCZOS).save(
+        buffer, format='JPEG', quality=IMAGE_VARIANT_QUALITY,
+        optimize=True, progressive=True)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_variants(post):
+    """Создаёт все копии изображения поста и отмечает их готовность."""
+    field = post.image
+    storage = field.storage
+    with field.open('rb'), Image.open(field) as source:
+        image = ImageOps.exif_transpose(source).convert('RGB')
+    widths = variant_widths(image.width)
+    for width in widths:
+        name = variant_name(field.name, width)
+        if storage.exists(name):
+            storage.delete(name)
+        storage.save(name, _render_variant(image, width))
+    # Картинку могли заменить, пока шла обработка.
+    updated = Post.objects.filter(pk=post.pk, image=field.name).update(
+        image_meta={
+            'width': image.width,
+            'height': image.height,
+            'widths': widths,
+        })
+    if updated:
+        page_cache.purge_post(post)
+    return updated
@@ -0,0 +1,242 @@
+"""Массовая загрузка фикстур в формате dumpdata для моделей блога.
+
+В отличие от loaddata файл не читается в память целиком и объекты
+не сохраняются по одному: файл разбирается потоком, строки пишутся
+через bulk_create порциями, каждая порция — в своей транзакции.
+
+Справочники и пользователи грузятся первым проходом по файлу, посты
+вторым, комментарии третьим, поэтому порядок объектов в файле не важен.
+Пользователи и категории сопоставляются по username и slug: уже
+существующие переиспользуются, новые получают свободный pk. У
+местоположений, постов и комментариев естественного ключа нет, их
+первичные ключи из файла сохраняются. Перед записью проверяется, что
+занятые в базе pk принадлежат тем же записям (повторный импорт того же
+файла): такие строки пропускаются и попадают в отчёт, а если под pk
+лежит другая запись, импорт отказывается начинаться — иначе комментарии
+прицепились бы к чужим постам.
+"""
+import json
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from . import lookups, page_cache
+from .constants import IMPORT_BATCH_SIZE, IMPORT_READ_SIZE
+from .models import Category, Comment, Location, Post
+from .utils import (recount_author_stats, recount_comment_counts,
+                    reset_publication_boundary)
+
+User = get_user_model()
+
+NATURAL_KEYS = {User: 'username', Category: 'slug'}
+
+# По этим полям запись под тем же pk считается уже загруженной из файла.
+IDENTITY_FIELDS = {
+    Location: ('name', 'created_at'),
+    Post: ('title', 'created_at'),
+    Comment: ('text', 'created_at'),
+}
+
+
+class ImportConflict(Exception):
+    """Первичные ключи из файла заняты в базе другими записями."""
+
+
+def iter_fixture(path, read_size=IMPORT_READ_SIZE):
+    """Отдаёт объекты JSON-массива по одному, читая файл кусками."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as fixture:
+        buffer, position, eof = '', 0, False
+        started = False
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if not started and position < len(buffer):
+                if buffer[position] != '[':
+                    raise ValueError('Фикстура должна быть JSON-массивом')
+                started, position = True, position + 1
+                continue
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            try:
+                obj, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    if buffer[position:].strip():
+                        raise
+                    return
+                chunk = fixture.read(read_size)
+                eof = not chunk
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+            yield obj
+            position = end
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """Не даёт bulk_create затереть даты создания из фикстуры."""
+    fields = [f for f in model._meta.concrete_fields
+              if getattr(f, 'auto_now_add', False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Importer:
+    def __init__(self, path, batch_size=IMPORT_BATCH_SIZE, report=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.report = report or (lambda message: None)
+        # pk из файла → pk в базе для моделей с внешними ключами на них.
+        self.maps = {User: {}, Category: {}, Location: {}}
+        self.stats = {}
+
+    def run(self):
+        self.check_conflicts()
+        self.load({
+            'auth.user': User,
+            'blog.category': Category,
+            'blog.location': Location,
+        })
+        self.load({'blog.post': Post})
+        self.load({'blog.comment': Comment})
+        recount_comment_counts()
+        recount_author_stats()
+        reset_publication_boundary()
+        lookups.invalidate()
+        page_cache.purge_all()
+        return self.stats
+
+    def load(self, models):
+        batches = {model: [] for model in models.values()}
+        started = time.perf_counter()
+        for obj in iter_fixture(self.path):
+            model = models.get(obj['model'])
+            if model is None:
+                continue
+            batch = batches[model]
+            batch.append(self.build(model, obj))
+            if len(batch) >= self.batch_size:
+                self.flush(model, batch)
+                batch.clear()
+        for model, batch in batches.items():
+            self.flush(model, batch)
+        for model in batches:
+            self.report_model(model, time.perf_counter() - started)
+
+    def check_conflicts(self):
+        models = {
+            model._meta.label_lower: model for model in IDENTITY_FIELDS}
+        batches = {model: {} for model in IDENTITY_FIELDS}
+        conflicts = []
+        for obj in iter_fixture(self.path):
+            model = models.get(obj['model'])
+            if model is None:
+                continue
+            batch = batches[model]
+            batch[obj['pk']] = obj['fields']
+            if len(batch) >= self.batch_size:
+                conflicts += self.find_conflicts(model, batch)
+                batch.clear()
+        for model, batch in batches.items():
+            conflicts += self.find_conflicts(model, batch)
+        if conflicts:
+            shown = ', '.join(conflicts[:10])
+            raise ImportConflict(
+                f'В базе под первичными ключами из файла другие записи '
+                f'({len(conflicts)}): {shown}. Импортируйте в пустую базу.')
+
+    def find_conflicts(self, model, batch):
+        names = IDENTITY_FIELDS[model]
+        fields = [model._meta.get_field(name) for name in names]
+        conflicts = []
+        for pk, *values in model.objects.filter(
+                pk__in=list(batch)).values_list('pk', *names):
+            expected = [
+                field.to_python(batch[pk].get(field.name))
+                for field in fields]
+            if values != expected:
+                conflicts.append(f'{model._meta.label_lower} pk={pk}')
+        return conflicts
+
+    def build(self, model, obj):
+        values = {'pk': obj['pk']}
+        for name, value in obj['fields'].items():
+            field = model._meta.get_field(name)
+            if field.many_to_many:
+                continue
+            if field.is_relation:
+                target = field.related_model
+                if value is not None and target in self.maps:
+                    value = self.maps[target].get(value)
+                values[field.attname] = value
+            else:
+                values[field.attname] = field.to_python(value)
+        return model(**values)
+
+    def flush(self, model, batch):
+        if not batch:
+            return
+        stats = self.stats.setdefault(
+            model._meta.label_lower, {'rows': 0, 'skipped': 0})
+        stats['rows'] += len(batch)
+        natural_key = NATURAL_KEYS.get(model)
+        if natural_key:
+            pending = {getattr(obj, natural_key): obj.pk for obj in batch}
+            fresh = self.skip_existing(model, natural_key, batch)
+        else:
+            fresh = self.skip_imported(model, batch)
+        stats['skipped'] += len(batch) - len(fresh)
+        with transaction.atomic(), keep_auto_now_add(model):
+            model.objects.bulk_create(
+                fresh, batch_size=self.batch_size, ignore_conflicts=True)
+        if natural_key:
+            self.map_natural_keys(model, natural_key, pending)
+        elif model in self.maps:
+            self.maps[model].update((obj.pk, obj.pk) for obj in batch)
+
+    def skip_imported(self, model, batch):
+        """Убирает строки, которые уже загружены предыдущим импортом."""
+        existing = set(model.objects.filter(
+            pk__in=[obj.pk for obj in batch]).values_list('pk', flat=True))
+        return [obj for obj in batch if obj.pk not in existing]
+
+    def skip_existing(self, model, natural_key, batch):
+        """Откладывает pk объектов с естественным ключом до вставки.
+
+        В базе под тем же pk может быть совсем другая запись, поэтому
+        такие объекты получают новый pk, а сопоставление строится по
+        username или slug.
+        """
+        existing = set(model.objects.filter(**{
+            f'{natural_key}__in': [getattr(obj, natural_key) for obj in batch]
+        }).values_list(natural_key, flat=True))
+        fresh = []
+        for obj in batch:
+            if getattr(obj, natural_key) not in existing:
+                obj.pk = None
+                fresh.append(obj)
+        return fresh
+
+    def map_natural_keys(self, model, natural_key, pending):
+        for key, pk in model.objects.filter(**{
+            f'{natural_key}__in': list(pending)
+        }).values_list(natural_key, 'pk'):
+            self.maps[model][pending[key]] = pk
+
+    def report_model(self, model, elapsed):
+        stats = self.stats.get(model._meta.label_lower)
+        if not stats:
+            return
+        stats['seconds'] = round(elapsed, 3)
+        self.report(
+            f'{model._meta.label_lower}: {stats["rows"]} строк за '
+            f'{elapsed:.1f} с ({stats["rows"] / max(elapsed, 1e-9):.0f} '
+            f'строк/с), уже были в базе: {stats["skipped"]}')
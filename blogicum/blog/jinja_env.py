@@ -0,0 +1,71 @@
+"""Окружение Jinja2 для горячих страниц блога.
+
+Шаблоны в каталоге jinja2/ повторяют шаблоны DTL строка в строку и должны
+давать тот же HTML байт в байт, поэтому вывод переменных устроен как в DTL:
+местное время, локализация и экранирование django.utils.html вместо
+markupsafe (они по-разному экранируют кавычки). Отсутствующие переменные,
+как и в DTL, выводятся пустой строкой.
+"""
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.template.defaultfilters import date as date_filter
+from django.template.defaultfilters import linebreaksbr, truncatewords
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.formats import localize
+from django.utils.html import conditional_escape
+from django.utils.safestring import SafeString
+from django.utils.timezone import template_localtime
+from django_bootstrap5.templatetags.django_bootstrap5 import (
+    bootstrap_button, bootstrap_form)
+from jinja2 import ChainableUndefined, Environment
+
+from .templatetags.post_images import srcset
+
+
+def finalize(value):
+    """Значение {{ ... }} так, как его выводит DTL."""
+    return conditional_escape(localize(template_localtime(value)))
+
+
+def url(view_name, *args, **kwargs):
+    return reverse(view_name, args=args, kwargs=kwargs)
+
+
+def date(value, arg=None):
+    # В DTL фильтр date получает значение уже в местном времени.
+    return date_filter(template_localtime(value), arg)
+
+
+def cache_fragment(timeout, fragment_name, *vary_on, using='default',
+                   caller):
+    """Аналог {% cache %}: тот же ключ, так что DTL и Jinja2 делят кэш."""
+    fragment_cache = caches[using]
+    key = make_template_fragment_key(fragment_name, vary_on)
+    value = fragment_cache.get(key)
+    if value is None:
+        value = SafeString(caller())
+        fragment_cache.set(key, value, timeout)
+    return value
+
+
+def environment(**options):
+    options['undefined'] = ChainableUndefined
+    options['finalize'] = finalize
+    # DTL не отрезает перевод строки в конце файла.
+    options['keep_trailing_newline'] = True
+    env = Environment(**options)
+    env.globals.update({
+        'bootstrap_button': bootstrap_button,
+        'bootstrap_form': bootstrap_form,
+        'cache_fragment': cache_fragment,
+        'static': static,
+        'url': url,
+    })
+    env.filters.update({
+        'date': date,
+        'linebreaksbr': linebreaksbr,
+        'srcset': srcset,
+        'truncatewords': truncatewords,
+    })
+    return env
@@ -0,0 +1,97 @@
+"""Справочники категорий и местоположений в памяти процесса.
+
+Таблицы маленькие и меняются редко, поэтому каждый процесс держит их
+целиком и подставляет объекты в посты вместо JOIN. Свежесть определяется
+версией в кэше по умолчанию: сохранение или удаление категории или места
+меняет версию, и процессы перечитывают справочники при следующем
+обращении. Если этот кэш свой у каждого процесса (LocMemCache), другие
+процессы смену версии не увидят, поэтому там версия живёт не дольше
+LOOKUP_LOCAL_TIMEOUT секунд и справочники перечитываются хотя бы так
+часто. Объекты справочников общие для всех запросов процесса — их можно
+только читать.
+"""
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import Http404
+
+from .constants import LOOKUP_VERSION_CACHE_KEY
+from .models import Category, Location, Post
+
+LookupTables = namedtuple(
+    'LookupTables', 'version categories category_slugs locations')
+
+_tables = LookupTables(None, {}, {}, {})
+
+
+def _version_timeout():
+    if isinstance(caches[DEFAULT_CACHE_ALIAS], LocMemCache):
+        return settings.LOOKUP_LOCAL_TIMEOUT
+    return None
+
+
+def _shared_version():
+    version = cache.get(LOOKUP_VERSION_CACHE_KEY)
+    if version is None:
+        # Вытесненная или истёкшая версия заменяется новой: процессы с
+        # прежней перечитают справочники.
+        version = time.time_ns()
+        if not cache.add(
+                LOOKUP_VERSION_CACHE_KEY, version, _version_timeout()):
+            version = cache.get(LOOKUP_VERSION_CACHE_KEY, version)
+    return version
+
+
+def get_tables():
+    global _tables
+    version = _shared_version()
+    if _tables.version != version:
+        categories = {
+            category.pk: category for category in Category.objects.all()}
+        _tables = LookupTables(
+            version=version,
+            categories=categories,
+            category_slugs={
+                category.slug: category for category in categories.values()},
+            locations={
+                location.pk: location for location in Location.objects.all()},
+        )
+    return _tables
+
+
+def invalidate():
+    cache.set(LOOKUP_VERSION_CACHE_KEY, time.time_ns(), _version_timeout())
+
+
+def unpublished_category_ids():
+    # Обычно список пуст или короток, а NOT IN не мешает SQLite вести
+    # ленту по индексу post_published_feed_idx.
+    return [
+        pk for pk, category in get_tables().categories.items()
+        if not category.is_published
+    ]
+
+
+def get_published_category(slug):
+    category = get_tables().category_slugs.get(slug)
+    if category is None or not category.is_published:
+        raise Http404('Category not found')
+    return category
+
+
+def attach_lookups(posts):
+    """Подставляет в посты категории и места из справочников."""
+    tables = get_tables()
+    category_field = Post._meta.get_field('category')
+    location_field = Post._meta.get_field('location')
+    for post in posts:
+        for field, table in ((category_field, tables.categories),
+                             (location_field, tables.locations)):
+            pk = getattr(post, field.attname)
+            # Неизвестный справочнику id загрузится обычным образом.
+            if pk is None or pk in table:
+                field.set_cached_value(post, table.get(pk))
+    return posts
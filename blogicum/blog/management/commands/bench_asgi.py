@@ -0,0 +1,189 @@
+import asyncio
+import importlib
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import AsyncClient, Client, override_settings
+from django.urls import clear_url_caches, reverse
+
+from blog import page_cache
+from blog.bench import (
+    compare_reports, default_report_path, summarize, write_report)
+from blog.models import Post
+from blog.utils import get_query_published_posts
+
+User = get_user_model()
+
+# Режим: обработчик Django и асинхронные ли страницы для чтения.
+MODES = {
+    'wsgi': ('wsgi', False),
+    'asgi': ('asgi', False),
+    'asgi_async': ('asgi', True),
+}
+
+
+def reload_urlconf():
+    importlib.reload(importlib.import_module('blog.urls'))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+@contextmanager
+def read_views(async_views):
+    """Отдаёт страницы для чтения через blog.async_views или blog.views."""
+    try:
+        with override_settings(ASYNC_VIEWS=async_views):
+            reload_urlconf()
+            yield
+    finally:
+        reload_urlconf()
+
+
+class Command(BaseCommand):
+    help = (
+        'Открывает ленту, категорию, пост и профиль несколькими '
+        'одновременными клиентами и сравнивает WSGI (поток на клиента) '
+        'с ASGI на одном цикле событий, с обычными и асинхронными '
+        'представлениями. Работает с базой из настроек.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument(
+            '--requests', type=int, default=40,
+            help='Запросов на клиента.')
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument(
+            '--login', action='store_true',
+            help='Клиенты входят на сайт, мимо кэша страниц.')
+        parser.add_argument(
+            '--mode', action='append', choices=list(MODES), default=[])
+        parser.add_argument('--output')
+        parser.add_argument('--compare')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError(
+                '--concurrency и --requests должны быть больше нуля.')
+        self.options = options
+        post = get_query_published_posts(Post.objects).first()
+        if post is None:
+            raise CommandError(
+                'Нет опубликованных постов; заполните базу командой '
+                'seed_bench_data.')
+        self.user = post.author if options['login'] else None
+        self.urls = [
+            reverse('blog:index'),
+            reverse('blog:category_posts', args=[post.category.slug]),
+            reverse('blog:post_detail', args=[post.pk]),
+            reverse('blog:profile', args=[post.author.username]),
+        ]
+        results = {}
+        for name in options['mode'] or MODES:
+            handler, async_views = MODES[name]
+            page_cache.purge_all()
+            # AsyncClient в Django 3.2 всегда представляется testserver.
+            with read_views(async_views), override_settings(
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                if handler == 'wsgi':
+                    results[name] = self.run_wsgi()
+                else:
+                    results[name] = self.run_asgi()
+            self.stdout.write(self.format_result(name, results[name]))
+        path = write_report(
+            options['output'] or default_report_path('asgi'),
+            'asgi', results,
+            concurrency=options['concurrency'],
+            requests=options['requests'],
+            login=options['login'])
+        self.stdout.write(self.style.SUCCESS(f'Отчёт: {path}'))
+        if options['compare']:
+            for line in compare_reports(
+                    options['compare'], results,
+                    metrics=('requests_per_s', 'p95_ms', 'p99_ms')):
+                self.stdout.write(line)
+
+    def make_clients(self, client_class):
+        clients = []
+        for _ in range(self.options['concurrency']):
+            client = client_class(raise_request_exception=False)
+            if self.user is not None:
+                client.force_login(self.user)
+            clients.append(client)
+        return clients
+
+    def plan(self, worker):
+        total = self.options['warmup'] + self.options['requests']
+        for i in range(total):
+            url = self.urls[(worker + i) % len(self.urls)]
+            yield url, i >= self.options['warmup']
+
+    def run_wsgi(self):
+        clients = self.make_clients(Client)
+        barrier = threading.Barrier(len(clients))
+        durations, errors = [], []
+
+        def worker(number, client):
+            barrier.wait()
+            try:
+                for url, measured in self.plan(number):
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    if measured:
+                        (errors if response.status_code != 200
+                         else durations).append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=worker, args=(number, client))
+            for number, client in enumerate(clients)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.result(durations, errors, time.perf_counter() - started)
+
+    def run_asgi(self):
+        clients = self.make_clients(AsyncClient)
+        durations, errors = [], []
+
+        async def worker(number, client):
+            for url, measured in self.plan(number):
+                started = time.perf_counter()
+                response = await client.get(url)
+                if measured:
+                    (errors if response.status_code != 200
+                     else durations).append(time.perf_counter() - started)
+
+        async def run():
+            await asyncio.gather(*(
+                worker(number, client)
+                for number, client in enumerate(clients)))
+
+        started = time.perf_counter()
+        asyncio.run(run())
+        return self.result(durations, errors, time.perf_counter() - started)
+
+    def result(self, durations, errors, elapsed):
+        total = self.options['concurrency'] * (
+            self.options['warmup'] + self.options['requests'])
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'requests_per_s': round(total / elapsed, 1),
+            'errors': len(errors),
+            **summarize(durations),
+        }
+
+    def format_result(self, name, result):
+        return (
+            f'{name:<10} запросов/с {result["requests_per_s"]}, '
+            f'ошибок {result["errors"]}, '
+            f'p50 {result["p50_ms"]} мс, p95 {result["p95_ms"]} мс, '
+            f'p99 {result["p99_ms"]} мс')
@@ -0,0 +1,188 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from blog.bench import (
+    compare_reports, default_report_path, summarize, write_report)
+from blog.models import Comment, Post
+from blog.utils import get_query_published_posts, recount_comment_counts
+
+User = get_user_model()
+
+BENCH_COMMENT_TEXT = 'Комментарий для замера конкурентной записи'
+
+# Так settings.DATABASES выглядели до настройки SQLite.
+BASELINE_PROFILE = {
+    'pragmas': {'journal_mode': 'delete', 'synchronous': 'full'},
+    'conn_max_age': 0,
+    'timeout': 5,
+    'retries': 0,
+}
+
+
+def tuned_profile():
+    database = settings.DATABASES[DEFAULT_DB_ALIAS]
+    return {
+        'pragmas': settings.SQLITE_PRAGMAS,
+        'conn_max_age': database.get('CONN_MAX_AGE', 0),
+        'timeout': database.get('OPTIONS', {}).get('timeout', 5),
+        'retries': settings.SQLITE_LOCK_RETRIES,
+    }
+
+
+@contextmanager
+def sqlite_profile(profile):
+    """Временно переключает соединения на другой профиль SQLite."""
+    connections.close_all()
+    # Все потоки создают соединения из этого же словаря.
+    database = connections[DEFAULT_DB_ALIAS].settings_dict
+    saved = database['CONN_MAX_AGE'], dict(database['OPTIONS'])
+    database['CONN_MAX_AGE'] = profile['conn_max_age']
+    database['OPTIONS']['timeout'] = profile['timeout']
+    try:
+        with override_settings(
+            SQLITE_PRAGMAS=profile['pragmas'],
+            SQLITE_LOCK_RETRIES=profile['retries'],
+        ):
+            yield
+    finally:
+        connections.close_all()
+        database['CONN_MAX_AGE'], database['OPTIONS'] = saved
+
+
+@contextmanager
+def quiet_request_errors():
+    # Ошибки «database is locked» считаются, а не печатаются.
+    logger = logging.getLogger('django.request')
+    level = logger.level
+    logger.setLevel(logging.CRITICAL)
+    try:
+        yield
+    finally:
+        logger.setLevel(level)
+
+
+class Command(BaseCommand):
+    help = (
+        'Пишет комментарии и читает пост из нескольких потоков и сравнивает '
+        'исходный профиль SQLite с настроенным. Работает с базой из '
+        'настроек; созданные комментарии удаляются после каждого профиля.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument(
+            '--writes', type=int, default=50,
+            help='Комментариев на поток.')
+        parser.add_argument(
+            '--reads-per-write', type=int, default=1)
+        parser.add_argument(
+            '--profile', choices=('baseline', 'tuned', 'both'),
+            default='both')
+        parser.add_argument('--output')
+        parser.add_argument('--compare')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Замер рассчитан на SQLite.')
+        self.options = options
+        # Пост с наименьшим числом комментариев: замеряется запись,
+        # а не отрисовка длинной ленты комментариев.
+        self.post = get_query_published_posts(Post.objects).order_by(
+            'comment_count').first()
+        self.users = list(User.objects.order_by('pk')[:options['threads']])
+        if self.post is None or len(self.users) < options['threads']:
+            raise CommandError(
+                'Нужны опубликованный пост и по пользователю на поток; '
+                'заполните базу командой seed_bench_data.')
+        profiles = {
+            'baseline': BASELINE_PROFILE, 'tuned': tuned_profile(),
+        }
+        if options['profile'] != 'both':
+            profiles = {options['profile']: profiles[options['profile']]}
+        results = {}
+        for name, profile in profiles.items():
+            try:
+                with sqlite_profile(profile), quiet_request_errors():
+                    results[name] = self.run_profile()
+            finally:
+                # Каждый профиль начинает с одинаковой страницы поста.
+                Comment.objects.filter(text=BENCH_COMMENT_TEXT).delete()
+                recount_comment_counts(post_ids=[self.post.pk])
+            self.stdout.write(self.format_result(name, results[name]))
+        path = write_report(
+            options['output'] or default_report_path('concurrency'),
+            'concurrency', results,
+            threads=options['threads'],
+            writes=options['writes'],
+            reads_per_write=options['reads_per_write'])
+        self.stdout.write(self.style.SUCCESS(f'Отчёт: {path}'))
+        if options['compare']:
+            for line in compare_reports(
+                    options['compare'], results,
+                    metrics=('writes_per_s', 'errors')):
+                self.stdout.write(line)
+
+    def run_profile(self):
+        clients = []
+        for user in self.users:
+            client = Client(HTTP_HOST='localhost',
+                            raise_request_exception=False)
+            client.force_login(user)
+            clients.append(client)
+        connections.close_all()
+        barrier = threading.Barrier(len(clients))
+        writes, reads, errors = [], [], []
+        threads = [
+            threading.Thread(
+                target=self.worker,
+                args=(client, barrier, writes, reads, errors))
+            for client in clients
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        return {
+            'elapsed_s': round(elapsed, 3),
+            'writes_per_s': round(len(writes) / elapsed, 1),
+            'errors': len(errors),
+            'write': summarize(writes),
+            'read': summarize(reads),
+        }
+
+    def worker(self, client, barrier, writes, reads, errors):
+        write_url = reverse('blog:add_comment', args=[self.post.pk])
+        read_url = reverse('blog:post_detail', args=[self.post.pk])
+        barrier.wait()
+        try:
+            for _ in range(self.options['writes']):
+                started = time.perf_counter()
+                response = client.post(write_url, {'text': BENCH_COMMENT_TEXT})
+                duration = time.perf_counter() - started
+                (errors if response.status_code >= 500 else writes).append(
+                    duration)
+                for _ in range(self.options['reads_per_write']):
+                    started = time.perf_counter()
+                    response = client.get(read_url)
+                    duration = time.perf_counter() - started
+                    (errors if response.status_code >= 500 else reads).append(
+                        duration)
+        finally:
+            connection.close()
+
+    def format_result(self, name, result):
+        return (
+            f'{name:<9} записей/с {result["writes_per_s"]}, '
+            f'ошибок {result["errors"]}, '
+            f'запись p95 {result["write"]["p95_ms"]} мс, '
+            f'чтение p95 {result["read"]["p95_ms"]} мс')
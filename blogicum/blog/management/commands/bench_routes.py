@@ -0,0 +1,172 @@
+import time
+import tracemalloc
+from collections import namedtuple
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from blog.bench import (
+    compare_reports, default_report_path, summarize, write_report)
+from blog.models import Category, Comment, Post
+from blog.utils import get_query_published_posts
+
+Route = namedtuple('Route', 'name url user method data', defaults=('get', {}))
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет все маршруты blog и pages через тестовый клиент и '
+        'сохраняет p50/p95/p99, число запросов к БД и пик памяти в JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument(
+            '--memory-requests', type=int, default=20,
+            help='Запросов в отдельном проходе с tracemalloc.')
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэши перед каждым запросом.')
+        parser.add_argument(
+            '--as-user', action='store_true',
+            help='Открывать публичные страницы залогиненным, мимо кэша '
+                 'страниц для анонимов.')
+        parser.add_argument('--route', action='append', default=[])
+        parser.add_argument('--output')
+        parser.add_argument(
+            '--compare', help='Прошлый отчёт для сравнения p50/p95.')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError('--requests должно быть больше нуля.')
+        self.options = options
+        routes = self.get_routes(options['as_user'])
+        if options['route']:
+            routes = [r for r in routes if r.name in options['route']]
+        results = {}
+        for route in routes:
+            results[route.name] = self.run_route(route)
+            self.stdout.write(
+                self.format_result(route.name, results[route.name]))
+        path = write_report(
+            options['output'] or default_report_path('routes'),
+            'routes', results,
+            requests=options['requests'],
+            cold=options['cold'],
+            as_user=options['as_user'],
+            posts=Post.objects.count(),
+            comments=Comment.objects.count())
+        self.stdout.write(self.style.SUCCESS(f'Отчёт: {path}'))
+        if options['compare']:
+            for line in compare_reports(options['compare'], results):
+                self.stdout.write(line)
+
+    def get_routes(self, as_user):
+        post = get_query_published_posts(Post.objects).order_by(
+            '-comment_count').first()
+        comment = Comment.objects.filter(post=post).select_related(
+            'author').first() if post else None
+        category = Category.objects.filter(
+            is_published=True, posts__in=get_query_published_posts(
+                Post.objects)).first()
+        if post is None or comment is None or category is None:
+            raise CommandError(
+                'Нужен опубликованный пост с комментарием; '
+                'заполните базу командой seed_bench_data.')
+        reader = post.author if as_user else None
+        author = post.author
+        return [
+            Route('index', reverse('blog:index'), reader),
+            Route('index_page_2', reverse('blog:index') + '?page=2', reader),
+            Route('post_detail',
+                  reverse('blog:post_detail', args=[post.pk]), reader),
+            Route('comments',
+                  reverse('blog:comments', args=[post.pk]), reader),
+            Route('category_posts',
+                  reverse('blog:category_posts', args=[category.slug]),
+                  reader),
+            Route('profile',
+                  reverse('blog:profile', args=[author.username]), reader),
+            Route('create_post', reverse('blog:create_post'), author),
+            Route('edit_post',
+                  reverse('blog:edit_post', args=[post.pk]), author),
+            Route('delete_post',
+                  reverse('blog:delete_post', args=[post.pk]), author),
+            Route('edit_profile', reverse('blog:edit_profile'), author),
+            Route('add_comment',
+                  reverse('blog:add_comment', args=[post.pk]), author,
+                  'post', {'text': 'Комментарий для замера'}),
+            Route('edit_comment',
+                  reverse('blog:edit_comment', args=[post.pk, comment.pk]),
+                  comment.author),
+            Route('delete_comment',
+                  reverse('blog:delete_comment', args=[post.pk, comment.pk]),
+                  comment.author),
+            Route('search',
+                  reverse('blog:search') + '?' + urlencode(
+                      {'q': post.title.split()[0]}), reader),
+            Route('about', reverse('pages:about'), reader),
+            Route('rules', reverse('pages:rules'), reader),
+        ]
+
+    def run_route(self, route):
+        client = Client(HTTP_HOST='localhost')
+        if route.user is not None:
+            client.force_login(route.user)
+        request = getattr(client, route.method)
+        durations, queries = [], []
+        # POST-маршруты пишут в базу: откатываем всё после замера.
+        with transaction.atomic():
+            for _ in range(self.options['warmup']):
+                request(route.url, route.data)
+            for _ in range(self.options['requests']):
+                if self.options['cold']:
+                    self.clear_caches()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = request(route.url, route.data)
+                    durations.append(time.perf_counter() - started)
+                queries.append(len(captured))
+            peak = self.measure_memory(route, request)
+            transaction.set_rollback(True)
+        return {
+            'url': route.url,
+            'method': route.method.upper(),
+            'status': response.status_code,
+            **summarize(durations),
+            'queries_mean': round(sum(queries) / len(queries), 2),
+            'queries_max': max(queries),
+            'peak_memory_kb': peak,
+        }
+
+    def measure_memory(self, route, request):
+        # Трассировка замедляет код, поэтому память меряется отдельно.
+        peak = 0
+        tracemalloc.start()
+        try:
+            for _ in range(self.options['memory_requests']):
+                if self.options['cold']:
+                    self.clear_caches()
+                tracemalloc.reset_peak()
+                request(route.url, route.data)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+        return round(peak / 1024, 1)
+
+    def clear_caches(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def format_result(self, name, result):
+        return (
+            f'{name:<16} {result["status"]} '
+            f'p50 {result["p50_ms"]} мс, p95 {result["p95_ms"]} мс, '
+            f'p99 {result["p99_ms"]} мс, '
+            f'запросов {result["queries_mean"]}, '
+            f'память {result["peak_memory_kb"]} КБ')
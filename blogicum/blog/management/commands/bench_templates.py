@@ -0,0 +1,150 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.jinja2 import Jinja2
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils import timezone
+
+from blog.bench import (
+    compare_reports, default_report_path, summarize, write_report)
+from blog.models import Category, Location, Post
+
+User = get_user_model()
+
+BASE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+# Загрузчики каждого профиля; production совпадает с settings.
+PROFILES = {
+    'uncached': BASE_LOADERS,
+    'cached': [('django.template.loaders.cached.Loader', BASE_LOADERS)],
+    'production': [
+        ('django.template.loaders.cached.Loader', [
+            ('blog.template_loaders.InliningLoader', BASE_LOADERS),
+        ]),
+    ],
+}
+
+# Jinja2 с шаблонами из jinja2/, как при BLOG_TEMPLATE_ENGINE = 'jinja2'.
+JINJA2 = 'jinja2'
+
+
+def make_backend(name, loaders):
+    config = settings.TEMPLATES[0]
+    return DjangoTemplates({
+        'NAME': f'bench-{name}',
+        'DIRS': config['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'context_processors': config['OPTIONS']['context_processors'],
+            'loaders': loaders,
+        },
+    })
+
+
+def make_jinja2_backend():
+    config = settings.TEMPLATES[1]
+    return Jinja2({
+        'NAME': 'bench-jinja2',
+        'DIRS': config['DIRS'],
+        'APP_DIRS': False,
+        'OPTIONS': config['OPTIONS'],
+    })
+
+
+def make_posts(count):
+    """Посты в памяти: замеряется шаблон, а не база."""
+    author = User(id=1, username='bench_author')
+    category = Category(
+        id=1, title='Путешествия', slug='travel', is_published=True)
+    location = Location(id=1, name='Остров', is_published=True)
+    now = timezone.now()
+    return [
+        Post(id=i, title=f'Пост {i}', text='Текст поста ' * 30,
+             pub_date=now, is_published=True, author=author,
+             category=category, location=location, comment_count=i)
+        for i in range(1, count + 1)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет рендеринг blog/index.html с заданным числом карточек '
+        'для профилей загрузчиков шаблонов: без кэша, с cached.Loader, '
+        'боевого (cached.Loader и встраивание include) и для Jinja2.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--renders', type=int, default=500)
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--cards', type=int, default=10)
+        parser.add_argument(
+            '--card-cache', action='store_true',
+            help='Не очищать кэш карточек между рендерингами.')
+        parser.add_argument(
+            '--profile', action='append', choices=[*PROFILES, JINJA2],
+            default=[])
+        parser.add_argument('--output')
+        parser.add_argument('--compare')
+
+    def handle(self, *args, **options):
+        if options['renders'] < 1:
+            raise CommandError('--renders должно быть больше нуля.')
+        self.options = options
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        request.resolver_match = resolve('/')
+        page = Paginator(
+            make_posts(options['cards']), options['cards']).page(1)
+        context = {
+            'page_obj': page, 'paginator': page.paginator,
+            'is_paginated': False, 'object_list': page.object_list,
+        }
+        results = {}
+        for name in options['profile'] or [*PROFILES, JINJA2]:
+            results[name] = self.run_profile(name, request, context)
+            self.stdout.write(self.format_result(name, results[name]))
+        path = write_report(
+            options['output'] or default_report_path('templates'),
+            'templates', results,
+            template='blog/index.html',
+            cards=options['cards'],
+            renders=options['renders'],
+            card_cache=options['card_cache'])
+        self.stdout.write(self.style.SUCCESS(f'Отчёт: {path}'))
+        if options['compare']:
+            for line in compare_reports(options['compare'], results):
+                self.stdout.write(line)
+
+    def run_profile(self, name, request, context):
+        if name == JINJA2:
+            backend = make_jinja2_backend()
+        else:
+            backend = make_backend(name, PROFILES[name])
+        started = time.perf_counter()
+        backend.get_template('blog/index.html')
+        compile_ms = (time.perf_counter() - started) * 1000
+        durations = []
+        for i in range(self.options['warmup'] + self.options['renders']):
+            if not self.options['card_cache']:
+                caches['post_cards'].clear()
+            started = time.perf_counter()
+            # Как в TemplateResponse: шаблон берётся заново на каждый ответ.
+            backend.get_template('blog/index.html').render(context, request)
+            if i >= self.options['warmup']:
+                durations.append(time.perf_counter() - started)
+        return {'first_load_ms': round(compile_ms, 2), **summarize(durations)}
+
+    def format_result(self, name, result):
+        return (
+            f'{name:<11} p50 {result["p50_ms"]} мс, '
+            f'p95 {result["p95_ms"]} мс, '
+            f'первая загрузка {result["first_load_ms"]} мс')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.constants import IMPORT_BATCH_SIZE
+from blog.importer import ImportConflict, Importer
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро загружает пользователей, категории, местоположения, посты '
+        'и комментарии из файла dumpdata; повторный запуск безопасен, а '
+        'первичные ключи, занятые другими записями, останавливают импорт.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixture')
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            Importer(
+                options['fixture'],
+                batch_size=options['batch_size'],
+                report=self.stdout.write,
+            ).run()
+        except ImportConflict as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS('Импорт завершён'))
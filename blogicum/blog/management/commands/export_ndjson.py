@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.export import (EXPORT_FIELDS, export_rows, ndjson_lines,
+                         parse_watermark)
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты или комментарии в NDJSON; с --since-id или '
+        '--since — только добавленные после отметки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORT_FIELDS))
+        parser.add_argument(
+            '--since-id', type=int,
+            help='Только объекты с id больше указанного.')
+        parser.add_argument(
+            '--since',
+            help='Только объекты, добавленные позже этого момента (ISO 8601).')
+        parser.add_argument(
+            '--output', '-o',
+            help='Файл для выгрузки; по умолчанию стандартный вывод.')
+
+    def handle(self, *args, **options):
+        try:
+            filters = parse_watermark(options['since_id'], options['since'])
+        except ValueError as e:
+            raise CommandError(e)
+        lines = ndjson_lines(export_rows(options['kind'], **filters))
+        if options['output'] is None:
+            self.write(self.stdout, lines)
+            return
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            count = self.write(output, lines)
+        self.stderr.write(f'Выгружено строк: {count}')
+
+    def write(self, output, lines):
+        count = 0
+        for line in lines:
+            output.write(line)
+            count += 1
+        return count
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from blog.images import generate_variants
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии изображений уже загруженных постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать копии, даже если они уже готовы.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.select_related('author').exclude(image='')
+        if not options['force']:
+            posts = posts.filter(image_meta={})
+        done = failed = 0
+        for post in posts.iterator(chunk_size=200):
+            try:
+                generate_variants(post)
+            except (OSError, ValueError) as e:
+                failed += 1
+                self.stderr.write(f'Пост {post.pk}: {e}')
+            else:
+                done += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано изображений: {done}, с ошибками: {failed}'))
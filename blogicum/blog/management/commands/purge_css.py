@@ -0,0 +1,38 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.css_purge import Purger, used_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает, сколько остаётся от таблиц стилей STATIC_PURGE_CSS '
+        'после удаления правил для классов, которых нет в шаблонах. '
+        'collectstatic чистит их так же сам.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*',
+            help='Пути в статике; по умолчанию STATIC_PURGE_CSS.')
+        parser.add_argument(
+            '--output-dir',
+            help='Записать очищенные файлы в этот каталог.')
+
+    def handle(self, *args, **options):
+        purger = Purger(used_tokens(), settings.STATIC_PURGE_SAFELIST)
+        for name in options['names'] or settings.STATIC_PURGE_CSS:
+            path = finders.find(name)
+            if path is None:
+                raise CommandError(f'Файл {name} не найден в статике.')
+            css = Path(path).read_text(encoding='utf-8')
+            purged = purger.purge(css)
+            if options['output_dir']:
+                output = Path(options['output_dir']) / name
+                output.parent.mkdir(parents=True, exist_ok=True)
+                output.write_text(purged, encoding='utf-8')
+            self.stdout.write(
+                f'{name}: {len(css.encode())} -> {len(purged.encode())} байт, '
+                f'правил {css.count("{")} -> {purged.count("{")}')
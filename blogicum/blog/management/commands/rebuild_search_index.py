@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.search import fts_available, optimize_index, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс постов из таблицы blog_post.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--optimize', action='store_true',
+            help='Только слить сегменты индекса, не перечитывая посты.')
+
+    def handle(self, *args, **options):
+        if not fts_available():
+            raise CommandError('Полнотекстовый индекс есть только на SQLite.')
+        if options['optimize']:
+            optimize_index()
+            self.stdout.write(self.style.SUCCESS('Индекс оптимизирован'))
+            return
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS('Индекс перестроен'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.utils import recount_author_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет AuthorStats с постами и комментариями и исправляет '
+        'расхождения; недостающие строки создаются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только сообщить о расхождениях, ничего не меняя.')
+
+    def handle(self, *args, **options):
+        drifted = recount_author_stats(dry_run=options['check'])
+        if options['check']:
+            if drifted:
+                raise CommandError(
+                    f'Авторов с неверной статистикой: {drifted}', returncode=1)
+            self.stdout.write('Авторов с неверной статистикой: 0')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено строк статистики: {drifted}'))
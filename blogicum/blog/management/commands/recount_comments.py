@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.utils import recount_comment_counts
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает Post.comment_count и исправляет расхождения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только сообщить о расхождениях, ничего не меняя.')
+
+    def handle(self, *args, **options):
+        drifted = recount_comment_counts(dry_run=options['check'])
+        if options['check']:
+            if drifted:
+                raise CommandError(
+                    f'Постов с неверным счётчиком: {drifted}', returncode=1)
+            self.stdout.write('Постов с неверным счётчиком: 0')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков: {drifted}'))
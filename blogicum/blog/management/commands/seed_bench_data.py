@@ -0,0 +1,155 @@
+import json
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from blog import lookups
+from blog.models import Category, Comment, Location, Post
+from blog.utils import recount_author_stats
+
+User = get_user_model()
+
+BENCH_PREFIX = 'bench_'
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу объёмными данными по образцу db.json для замеров. '
+        'Запускайте на отдельной копии базы: данные не удаляются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument('--comments', type=int, default=1_000_000)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--fixture', default=str(settings.BASE_DIR / 'db.json'),
+            help='Файл в формате dumpdata, откуда берутся образцы.')
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=BENCH_PREFIX).exists():
+            raise CommandError(
+                'Данные для замеров уже загружены в эту базу.')
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        samples = self.load_samples(options['fixture'])
+        started = time.perf_counter()
+        with transaction.atomic():
+            categories, locations = self.seed_lookups(samples)
+        # bulk_create не шлёт сигналов, справочники сбрасываются вручную.
+        lookups.invalidate()
+        user_ids = self.seed_users(options['users'])
+        comment_counts = self.distribute(options['comments'], options['posts'])
+        post_ids = self.seed_posts(
+            options['posts'], samples, user_ids, categories, locations,
+            comment_counts)
+        self.seed_comments(post_ids, comment_counts, user_ids)
+        recount_author_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово за {time.perf_counter() - started:.1f} с'))
+
+    def load_samples(self, path):
+        with open(path, encoding='utf-8') as fixture:
+            objects = json.load(fixture)
+        samples = {}
+        for obj in objects:
+            samples.setdefault(obj['model'], []).append(obj['fields'])
+        return samples
+
+    def seed_lookups(self, samples):
+        # SQLite не возвращает pk из bulk_create, поэтому перечитываем их.
+        Category.objects.bulk_create(
+            Category(
+                title=fields['title'],
+                description=fields['description'],
+                slug=f'{BENCH_PREFIX}{fields["slug"]}',
+                is_published=fields['is_published'])
+            for fields in samples['blog.category'])
+        locations = Location.objects.bulk_create(
+            Location(name=fields['name'], is_published=fields['is_published'])
+            for fields in samples['blog.location'])
+        category_ids = list(Category.objects.filter(
+            slug__startswith=BENCH_PREFIX).values_list('pk', flat=True))
+        location_ids = list(Location.objects.order_by('-pk').values_list(
+            'pk', flat=True)[:len(locations)])
+        return category_ids, location_ids
+
+    def seed_users(self, count):
+        password = make_password(None)
+        self.bulk(User, (
+            User(username=f'{BENCH_PREFIX}{i}', password=password)
+            for i in range(count)), count, 'пользователей')
+        return list(User.objects.filter(
+            username__startswith=BENCH_PREFIX).values_list('pk', flat=True))
+
+    def distribute(self, comments, posts):
+        # Несколько «вирусных» постов и длинный хвост, как в жизни.
+        weights = [1 / (rank + 1) for rank in range(posts)]
+        counts = [0] * posts
+        for index in self.random.choices(range(posts), weights, k=comments):
+            counts[index] += 1
+        return counts
+
+    def seed_posts(self, count, samples, user_ids, categories, locations,
+                   comment_counts):
+        texts = samples['blog.post']
+        now = timezone.now()
+
+        def posts():
+            for i in range(count):
+                sample = texts[i % len(texts)]
+                yield Post(
+                    title=sample['title'],
+                    text=sample['text'],
+                    # Примерно 2% отложенных публикаций.
+                    pub_date=now - timedelta(
+                        minutes=self.random.randint(-30_000, 2_600_000)),
+                    is_published=self.random.random() > 0.05,
+                    author_id=self.random.choice(user_ids),
+                    category_id=self.random.choice(categories),
+                    location_id=self.random.choice(locations),
+                    comment_count=comment_counts[i],
+                )
+        first_id = (Post.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0) + 1
+        self.bulk(Post, posts(), count, 'постов')
+        return list(Post.objects.filter(pk__gte=first_id).order_by(
+            'pk').values_list('pk', flat=True))
+
+    def seed_comments(self, post_ids, comment_counts, user_ids):
+        def comments():
+            for post_id, total in zip(post_ids, comment_counts):
+                for i in range(total):
+                    yield Comment(
+                        post_id=post_id,
+                        author_id=self.random.choice(user_ids),
+                        text=f'Комментарий {i + 1}')
+        self.bulk(Comment, comments(), sum(comment_counts), 'комментариев')
+
+    def bulk(self, model, objects, total, label):
+        started = time.perf_counter()
+        batch, done = [], 0
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                done += self.flush(model, batch)
+                batch = []
+        done += self.flush(model, batch)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{label}: {done} из {total} за {elapsed:.1f} с '
+            f'({done / max(elapsed, 1e-9):.0f} строк/с)')
+
+    def flush(self, model, batch):
+        if batch:
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+        return len(batch)
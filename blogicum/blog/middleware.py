@@ -0,0 +1,216 @@
+import logging
+import mimetypes
+import os
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.db import connections
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from .constants import STATIC_IMMUTABLE_MAX_AGE, STATIC_MAX_AGE
+from .routers import routing_state
+
+logger = logging.getLogger(__name__)
+
+_query_stats = ContextVar('query_stats', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление выполнило больше запросов, чем позволяет бюджет."""
+
+
+class QueryStats:
+    """execute_wrapper, считающий запросы, время в БД и повторы SQL."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    def repeated(self, threshold):
+        return {
+            sql: times for sql, times in self.statements.items()
+            if times >= threshold
+        }
+
+
+@contextmanager
+def track_queries():
+    """Считает запросы этого потока в статистику текущего запроса.
+
+    Соединения с базой у каждого потока свои, поэтому код, который
+    выполняет запросы запроса в другом потоке, открывает этот блок там.
+    Вне QueryBudgetMiddleware ничего не делает.
+    """
+    stats = _query_stats.get()
+    with ExitStack() as stack:
+        if stats is not None:
+            for connection in connections.all():
+                if stats not in connection.execute_wrappers:
+                    stack.enter_context(connection.execute_wrapper(stats))
+        yield
+
+
+class QueryBudgetMiddleware:
+    """Следит за числом запросов на представление и ищет N+1.
+
+    Бюджеты задаются в settings.QUERY_BUDGETS по имени маршрута.
+    При QUERY_BUDGET_RAISE превышение бюджета и повторы одного и того же
+    SQL приводят к исключению, иначе только пишутся в лог. Считается доля
+    запросов QUERY_BUDGET_SAMPLE_RATE; совсем выключает проверку
+    QUERY_BUDGET_ENABLED. Заголовок Server-Timing с числом запросов и
+    временем в БД добавляется при QUERY_BUDGET_SERVER_TIMING.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_BUDGET_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = getattr(settings, 'QUERY_BUDGET_SAMPLE_RATE', 1.0)
+        if rate < 1 and random.random() >= rate:
+            return self.get_response(request)
+        stats = QueryStats()
+        token = _query_stats.set(stats)
+        try:
+            with track_queries():
+                response = self.get_response(request)
+        finally:
+            _query_stats.reset(token)
+        request.query_stats = stats
+        if getattr(settings, 'QUERY_BUDGET_SERVER_TIMING', False):
+            response['Server-Timing'] = (
+                f'db;dur={stats.duration * 1000:.1f};'
+                f'desc="{stats.count} queries"')
+        match = request.resolver_match
+        if match is not None:
+            self.check(match.view_name, stats)
+        return response
+
+    def check(self, view_name, stats):
+        problems = []
+        budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+        if budget is not None and stats.count > budget:
+            problems.append(
+                f'{view_name}: {stats.count} запросов при бюджете {budget}')
+        repeated = stats.repeated(
+            getattr(settings, 'QUERY_BUDGET_REPEAT_THRESHOLD', 3))
+        for sql, times in repeated.items():
+            problems.append(f'{view_name}: возможен N+1, {times}x {sql}')
+        if not problems:
+            return
+        if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+            raise QueryBudgetExceeded('\n'.join(problems))
+        for problem in problems:
+            logger.warning(problem)
+
+
+class ReplicaStickinessMiddleware:
+    """Закрепляет за основной базой того, кто только что что-то записал.
+
+    Отметка хранится в cookie со сроком REPLICA_STICKY_SECONDS, так что
+    закрепление не стоит ни одного запроса к базе.
+    """
+
+    cookie_name = 'primary_pin'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = self.cookie_name in request.COOKIES
+        with routing_state(pinned) as state:
+            response = self.get_response(request)
+        if state.wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                self.cookie_name, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику из STATIC_ROOT без веб-сервера перед Django.
+
+    Включается настройкой SERVE_STATIC. Файлы с хэшем в имени кэшируются
+    браузером на год, остальные — на STATIC_MAX_AGE секунд. Если клиент
+    принимает сжатие, отдаётся готовая копия .br или .gz из collectstatic.
+    """
+
+    encodings = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SERVE_STATIC', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = settings.STATIC_ROOT
+        self.immutable = set(
+            getattr(staticfiles_storage, 'hashed_files', {}).values())
+
+    def __call__(self, request):
+        if (request.method in ('GET', 'HEAD')
+                and request.path_info.startswith(self.prefix)):
+            return self.serve(request, request.path_info[len(self.prefix):])
+        return self.get_response(request)
+
+    def accepted_encodings(self, request):
+        return {
+            encoding.split(';')[0].strip()
+            for encoding in request.META.get(
+                'HTTP_ACCEPT_ENCODING', '').split(',')
+        }
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            raise Http404(name)
+        if not os.path.isfile(path):
+            raise Http404(name)
+        compressed = [
+            (encoding, path + suffix) for encoding, suffix in self.encodings
+            if os.path.isfile(path + suffix)]
+        accepted = self.accepted_encodings(request)
+        encoding, variant = next(
+            ((encoding, variant) for encoding, variant in compressed
+             if encoding in accepted),
+            (None, path))
+        stat = os.stat(path)
+        response = get_conditional_response(
+            request, last_modified=int(stat.st_mtime))
+        if response is None:
+            content_type = mimetypes.guess_type(name)[0]
+            response = FileResponse(
+                open(variant, 'rb'),
+                content_type=content_type or 'application/octet-stream')
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if name in self.immutable:
+            response['Cache-Control'] = (
+                f'public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable')
+        else:
+            response['Cache-Control'] = f'public, max-age={STATIC_MAX_AGE}'
+        if compressed:
+            patch_vary_headers(response, ['Accept-Encoding'])
+        return response
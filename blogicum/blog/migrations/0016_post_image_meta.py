@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 18:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_post_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_meta',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Заполняется после создания уменьшенных копий: width, height и список ширин widths.', verbose_name='Размеры фото и его копий'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 3.2.16 on 2026-10-18 18:39
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+import django.db.models.deletion
+
+
+def fill_author_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    AuthorStats = apps.get_model('blog', 'AuthorStats')
+    AuthorStats.objects.bulk_create(
+        AuthorStats(user_id=pk)
+        for pk in User.objects.values_list('pk', flat=True).iterator())
+
+    def by_author(model, aggregate):
+        return Subquery(model.objects.filter(
+            author=OuterRef('user')
+        ).order_by().values('author').annotate(
+            value=aggregate).values('value'))
+
+    last_post = by_author(Post, Max('created_at'))
+    last_comment = by_author(Comment, Max('created_at'))
+    AuthorStats.objects.update(
+        post_count=Coalesce(by_author(Post, Count('pk')), 0),
+        comment_count=Coalesce(by_author(Comment, Count('pk')), 0),
+        last_activity=Greatest(
+            Coalesce(last_post, last_comment),
+            Coalesce(last_comment, last_post)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0017_post_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Публикаций')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='Комментариев')),
+                ('last_activity', models.DateTimeField(blank=True, help_text='Время самого нового поста или комментария автора.', null=True, verbose_name='Последняя активность')),
+            ],
+            options={
+                'verbose_name': 'статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+        migrations.RunPython(fill_author_stats, migrations.RunPython.noop),
+    ]
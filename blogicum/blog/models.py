@@ -1,10 +1,40 @@
+import hashlib
+import threading
+from contextlib import contextmanager
+
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.query import ModelIterable
 
 from .constants import MAX_LENGTH_CHAR_FIELD, MAX_LENGTH_CHAR_FIELD_COMMENT
 
 User = get_user_model()
 
+_deletion = threading.local()
+
+
+def deleting_posts():
+    """Посты, которые этот поток удаляет, и авторы их комментариев.
+
+    Заполняется сигналами (см. blog.signals) только внутри post_deletion(),
+    иначе None: каскадное удаление снаружи, например вместе с
+    пользователем, обновляет счётчики по каждому комментарию.
+    """
+    return getattr(_deletion, 'posts', None)
+
+
+@contextmanager
+def post_deletion():
+    """Отметки удаляемых постов живут ровно столько, сколько удаление."""
+    if deleting_posts() is not None:
+        yield
+        return
+    _deletion.posts = {}
+    try:
+        yield
+    finally:
+        del _deletion.posts
+
 
 class AbstractModel(models.Model):
     is_published = models.BooleanField(
@@ -19,6 +49,33 @@ class AbstractModel(models.Model):
         abstract = True
 
 
+class PostQuerySet(models.QuerySet):
+    _with_lookups = False
+
+    def with_lookups(self):
+        """Категории и места берутся из справочников процесса, без JOIN."""
+        clone = self._chain()
+        clone._with_lookups = True
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._with_lookups = self._with_lookups
+        return clone
+
+    def delete(self):
+        with post_deletion():
+            return super().delete()
+
+    def _fetch_all(self):
+        fetched = self._result_cache is None
+        super()._fetch_all()
+        if (fetched and self._with_lookups
+                and issubclass(self._iterable_class, ModelIterable)):
+            from .lookups import attach_lookups
+            attach_lookups(self._result_cache)
+
+
 class Post(AbstractModel):
     title = models.CharField(
         max_length=MAX_LENGTH_CHAR_FIELD,
@@ -48,14 +105,64 @@ class Post(AbstractModel):
         verbose_name='Категория')
 
     image = models.ImageField('Фото', upload_to='blog_images', blank=True)
+    image_meta = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Размеры фото и его копий',
+        help_text='Заполняется после создания уменьшенных копий: '
+                  'width, height и список ширин widths.')
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев')
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                condition=models.Q(is_published=True),
+                name='post_published_feed_idx'),
+            models.Index(
+                fields=('category', '-pub_date', '-id'),
+                condition=models.Q(is_published=True),
+                name='post_category_feed_idx'),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx'),
+        )
 
     def __str__(self):
         return self.title
 
+    def delete(self, *args, **kwargs):
+        with post_deletion():
+            return super().delete(*args, **kwargs)
+
+    @property
+    def card_version(self):
+        """Отпечаток всех данных, которые выводит includes/post_card.html.
+
+        Входит в ключ кэша карточки, поэтому правка поста, его категории,
+        местоположения, имени автора или числа комментариев сама
+        делает старую запись недостижимой.
+        """
+        category, location = self.category, self.location
+        fingerprint = (
+            self.title, self.text, self.pub_date.isoformat(),
+            self.is_published, self.image.name, self.image_meta,
+            self.comment_count,
+            self.author.username,
+            category and (category.slug, category.title,
+                          category.is_published),
+            location and (location.name, location.is_published),
+        )
+        return hashlib.md5(repr(fingerprint).encode()).hexdigest()
+
 
 class Category(AbstractModel):
     title = models.CharField(
@@ -113,6 +220,45 @@ class Comment(models.Model):
         ordering = ['created_at']
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_post_thread_idx'),
+        )
 
     def __str__(self):
         return self.author
+
+
+class AuthorStats(models.Model):
+    """Сводка по автору для страницы профиля.
+
+    Создание поста или комментария увеличивает счётчики, удаление
+    пересчитывает строку автора целиком; расхождения находит и чинит
+    команда recount_author_stats.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Автор')
+    post_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Публикаций')
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Комментариев')
+    last_activity = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Последняя активность',
+        help_text='Время самого нового поста или комментария автора.')
+
+    class Meta:
+        verbose_name = 'статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        return f'Статистика {self.user_id}'
@@ -0,0 +1,131 @@
+"""Кэш целых страниц для анонимных читателей.
+
+Ключ страницы складывается из поколений её групп (``index``,
+``category:<slug>``, ``post:<id>``, ``profile:<username>`` и общей
+``global``) и полного пути с номером страницы или курсором. Сброс группы —
+это смена её поколения: все страницы группы разом становятся недостижимы.
+
+Поколения живут в том же кэше, что и страницы. Если это кэш одного
+процесса (LocMemCache), сброс в одном процессе не виден остальным, поэтому
+и страницы, и поколения там хранятся не дольше PAGE_CACHE_LOCAL_TIMEOUT
+секунд: настолько другой процесс может отстать от правки. Для нескольких
+процессов PAGE_CACHE_ALIAS должен указывать на общий кэш.
+"""
+import hashlib
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+from .utils import get_publication_boundary, publication_timeout
+
+GLOBAL_GROUP = 'global'
+
+stats = Counter()
+
+
+def get_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def cache_timeout(timeout):
+    """Срок записи; в кэше одного процесса не больше локального."""
+    if not isinstance(get_cache(), LocMemCache):
+        return timeout
+    local = settings.PAGE_CACHE_LOCAL_TIMEOUT
+    return local if timeout is None else min(timeout, local)
+
+
+def _generation_key(group):
+    return f'blog-page-gen:{group}'
+
+
+def _new_generation():
+    # Уникальное значение: вытесненное поколение не воскресит старые ключи.
+    return time.time_ns()
+
+
+def purge(*groups):
+    page_cache = get_cache()
+    page_cache.set_many({
+        _generation_key(group): _new_generation() for group in groups
+    }, cache_timeout(None))
+
+
+def purge_post(post):
+    purge(
+        'index',
+        'categories',
+        f'post:{post.pk}',
+        f'profile:{post.author.username}',
+    )
+
+
+def purge_all():
+    purge(GLOBAL_GROUP)
+
+
+def get_generations(groups):
+    """Поколения групп вместе с global; это наносекунды их сброса."""
+    page_cache = get_cache()
+    keys = [_generation_key(group) for group in (GLOBAL_GROUP, *groups)]
+    generations = page_cache.get_many(keys)
+    missing = {
+        key: _new_generation() for key in keys if key not in generations
+    }
+    if missing:
+        page_cache.set_many(missing, cache_timeout(None))
+        generations.update(missing)
+    return [generations[key] for key in keys]
+
+
+def get_page_key(request, groups):
+    fingerprint = ':'.join(
+        [str(generation) for generation in get_generations(groups)]
+        + [request.get_full_path()])
+    return 'blog-page:' + hashlib.md5(fingerprint.encode()).hexdigest()
+
+
+def record(view_name, outcome):
+    if getattr(settings, 'PAGE_CACHE_STATS', False):
+        stats[(view_name, outcome)] += 1
+
+
+class AnonymousPageCacheMixin:
+    """Отдаёт анонимам готовую страницу из кэша, минуя ORM и шаблоны.
+
+    Представление обязано задать page_cache_groups — группы, при сбросе
+    которых страница устаревает; поля в фигурных скобках подставляются
+    из self.kwargs, например ``('post:{id}',)``.
+    """
+
+    page_cache_groups = None
+
+    def get_page_cache_groups(self):
+        if self.page_cache_groups is None:
+            raise ImproperlyConfigured(
+                f'{type(self).__name__} должен задать page_cache_groups.')
+        return [
+            group.format(**self.kwargs) for group in self.page_cache_groups
+        ]
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return super().dispatch(request, *args, **kwargs)
+        view_name = request.resolver_match.view_name
+        key = get_page_key(request, self.get_page_cache_groups())
+        response = get_cache().get(key)
+        if response is not None:
+            record(view_name, 'hit')
+            return response
+        record(view_name, 'miss')
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and not response.cookies:
+            timeout = cache_timeout(publication_timeout(
+                settings.PAGE_CACHE_TIMEOUT, get_publication_boundary()))
+            response.add_post_render_callback(
+                lambda rendered: get_cache().set(key, rendered, timeout))
+        return response
@@ -0,0 +1,140 @@
+import base64
+import binascii
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(direction, obj, field='pub_date'):
+    raw = f'{direction}|{getattr(obj, field).isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(
+            cursor + '=' * (-len(cursor) % 4)).decode()
+        direction, pub_date, pk = raw.split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidPage('Invalid cursor')
+    if direction not in (NEXT, PREVIOUS) or pub_date is None:
+        raise InvalidPage('Invalid cursor')
+    return direction, pub_date, pk
+
+
+class CursorPage:
+    """Страница ленты, адресуемая курсором вместо номера."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} items>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset-пагинация по (pub_date, id) без COUNT(*) и OFFSET."""
+
+    ordering = ('-pub_date', '-id')
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    def page(self, cursor=None):
+        if not cursor:
+            return self._forward(self.object_list, has_previous=False)
+        direction, pub_date, pk = decode_cursor(cursor)
+        if direction == NEXT:
+            return self._forward(
+                self.object_list.filter(
+                    Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk),
+                    pub_date__lte=pub_date),
+                has_previous=True)
+        return self._backward(
+            self.object_list.filter(
+                Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk),
+                pub_date__gte=pub_date))
+
+    def _forward(self, queryset, has_previous):
+        rows = list(
+            queryset.order_by(*self.ordering)[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return self._make_page(rows, has_next, has_previous)
+
+    def _backward(self, queryset):
+        rows = list(queryset.order_by(
+            *(field.lstrip('-') for field in self.ordering)
+        )[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return self._make_page(rows, True, has_previous)
+
+    def _make_page(self, rows, has_next, has_previous):
+        if not rows:
+            return CursorPage(rows)
+        return CursorPage(
+            rows,
+            next_cursor=encode_cursor(NEXT, rows[-1]) if has_next else None,
+            previous_cursor=(
+                encode_cursor(PREVIOUS, rows[0]) if has_previous else None))
+
+
+class CommentPaginator:
+    """Комментарии поста порциями вперёд по (created_at, id).
+
+    Порядок тот же, что в Comment.Meta.ordering; id различает
+    комментарии, оставленные в одну и ту же микросекунду.
+    """
+
+    ordering = ('created_at', 'id')
+
+    def __init__(self, object_list, per_page):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+
+    def page(self, cursor=None):
+        queryset = self.object_list
+        if cursor:
+            direction, created_at, pk = decode_cursor(cursor)
+            if direction != NEXT:
+                raise InvalidPage('Invalid cursor')
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at,
+                                                 id__gt=pk),
+                created_at__gte=created_at)
+        rows = list(queryset.order_by(*self.ordering)[:self.per_page + 1])
+        if len(rows) <= self.per_page:
+            return CursorPage(rows)
+        rows = rows[:self.per_page]
+        return CursorPage(
+            rows, next_cursor=encode_cursor(NEXT, rows[-1], 'created_at'))
@@ -0,0 +1,75 @@
+"""Чтение моделей блога с реплик, запись — в основную базу.
+
+Реплики перечислены в settings.DATABASE_REPLICAS; пока список пуст,
+роутер ничего не меняет. Чтобы пользователь сразу видел свою правку,
+после записи в модели блога его запросы на REPLICA_STICKY_SECONDS
+закрепляются за основной базой — этим управляет
+ReplicaStickinessMiddleware. Фоновые задачи блога читают из основной базы
+через use_primary(): реплика может ещё не получить то, ради чего задачу
+поставили.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+class RoutingState:
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+# Состояние текущего запроса; вне запросов (команды, задачи) — None.
+_state = ContextVar('replica_routing', default=None)
+
+
+def get_state():
+    return _state.get()
+
+
+@contextmanager
+def routing_state(pinned=False):
+    state = RoutingState(pinned)
+    token = _state.set(state)
+    try:
+        yield state
+    finally:
+        _state.reset(token)
+
+
+def use_primary():
+    """Все чтения внутри блока идут в основную базу."""
+    return routing_state(pinned=True)
+
+
+def is_routed(model):
+    return bool(settings.DATABASE_REPLICAS) and (
+        model._meta.app_label in settings.REPLICA_APP_LABELS)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not is_routed(model):
+            return None
+        state = _state.get()
+        if state is not None and (state.pinned or state.wrote):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        if not is_routed(model):
+            # Сессия и last_login при входе не должны закреплять читателя.
+            return None
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
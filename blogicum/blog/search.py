@@ -0,0 +1,165 @@
+"""Полнотекстовый поиск по заголовкам и текстам постов.
+
+На SQLite используется FTS5-таблица blog_post_fts (миграция 0017),
+которую триггеры держат в согласии с blog_post. Результаты ранжируются
+по bm25 с большим весом заголовка. Ранжировать все совпадения частого
+слова на миллионе постов слишком долго, поэтому bm25 считается только
+для SEARCH_CANDIDATES самых новых опубликованных совпадений: FTS5 отдаёт
+их по убыванию rowid, не трогая остальные. Это осознанный компромисс —
+более старые посты по частому слову в выдачу не попадают, и страница
+поиска об этом предупреждает (см. search_is_truncated). Скрытые и
+отложенные посты отсекаются внутри окна и места в нём не занимают. На
+других СУБД поиск откатывается к icontains с сортировкой по дате.
+
+Совпадения размечаются символами из области частного использования
+Юникода: текст сначала экранируется, потом маркеры заменяются на <mark>,
+поэтому HTML из постов не попадает на страницу как есть.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+from .constants import SEARCH_CANDIDATES, SEARCH_SNIPPET_TOKENS
+from .models import Post
+from .utils import get_query_published_posts
+
+SEARCH_TABLE = 'blog_post_fts'
+
+MARK_START, MARK_END = '\ue000', '\ue001'
+
+# Заголовок весит больше текста.
+TITLE_WEIGHT, TEXT_WEIGHT = 10.0, 1.0
+
+WORD_RE = re.compile(r'\w+')
+
+
+def search_terms(query):
+    return WORD_RE.findall(query.lower())[:16]
+
+
+def fts_available():
+    return connection.vendor == 'sqlite'
+
+
+def match_expression(terms):
+    # В выражение попадают только буквы и цифры. Поиск по префиксу — для
+    # слов от двух букв: на них есть префиксный индекс.
+    return ' '.join(
+        f'"{term}"*' if len(term) > 1 else f'"{term}"' for term in terms)
+
+
+def fts_conditions():
+    return [
+        f'{SEARCH_TABLE}.rowid = blog_post.id',
+        f'{SEARCH_TABLE} MATCH %s',
+    ]
+
+
+def newest_matches(terms):
+    """Опубликованные посты по словам запроса, самые новые первыми."""
+    posts = get_query_published_posts(Post.objects)
+    if fts_available():
+        return posts.extra(
+            tables=[SEARCH_TABLE], where=fts_conditions(),
+            params=[match_expression(terms)],
+            order_by=[f'-{SEARCH_TABLE}.rowid'],
+        )
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(text__icontains=term)
+    return posts.filter(condition)
+
+
+def search_posts(query):
+    """Опубликованные посты по запросу, лучшие совпадения первыми."""
+    terms = search_terms(query)
+    if not terms:
+        return Post.objects.none()
+    if not fts_available():
+        return newest_matches(terms)[:SEARCH_CANDIDATES]
+    match = match_expression(terms)
+    # Окно — самые новые видимые совпадения: FTS5 отдаёт их по убыванию
+    # rowid и останавливается на LIMIT. Подзапрос вставляется текстом:
+    # подзапрос Django переименовал бы blog_post, а условия extra()
+    # ссылаются на неё по имени.
+    window, window_params = newest_matches(terms).values(
+        'pk')[:SEARCH_CANDIDATES].query.sql_with_params()
+    return get_query_published_posts(Post.objects).extra(
+        tables=[SEARCH_TABLE],
+        where=[
+            *fts_conditions(),
+            f'{SEARCH_TABLE}.rowid >= (SELECT min(id) FROM ({window}))',
+        ],
+        params=[match, *window_params],
+        select={
+            'search_rank': f'bm25({SEARCH_TABLE}, %s, %s)',
+            'title_marked': f'highlight({SEARCH_TABLE}, 0, %s, %s)',
+            'text_marked': (
+                f"snippet({SEARCH_TABLE}, 1, %s, %s, '…', %s)"),
+        },
+        select_params=(
+            TITLE_WEIGHT, TEXT_WEIGHT,
+            MARK_START, MARK_END,
+            MARK_START, MARK_END, SEARCH_SNIPPET_TOKENS,
+        ),
+    ).order_by('search_rank', '-pub_date', '-id')
+
+
+def search_is_truncated(query, count):
+    """Остались ли совпадения старше окна из count самых новых.
+
+    Окно неполное — значит, вошло всё. Иначе проверяется, есть ли
+    совпадение под номером SEARCH_CANDIDATES + 1; это FTS5 тоже отдаёт,
+    не трогая остальные.
+    """
+    if count < SEARCH_CANDIDATES:
+        return False
+    return newest_matches(
+        search_terms(query))[SEARCH_CANDIDATES:].exists()
+
+
+def mark_terms(text, terms):
+    """Разметка совпадений для запасного пути без FTS."""
+    if not terms:
+        return text
+    pattern = re.compile(
+        '|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+    return pattern.sub(lambda m: f'{MARK_START}{m.group()}{MARK_END}', text)
+
+
+def render_marked(text):
+    html = escape(text)
+    return mark_safe(
+        html.replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+def attach_highlights(posts, query):
+    """Добавляет постам title_html и snippet_html для шаблона."""
+    terms = search_terms(query)
+    for post in posts:
+        title = getattr(post, 'title_marked', None)
+        text = getattr(post, 'text_marked', None)
+        if title is None:
+            title = mark_terms(post.title, terms)
+            text = mark_terms(
+                Truncator(post.text).words(SEARCH_SNIPPET_TOKENS), terms)
+        post.title_html = render_marked(title)
+        post.snippet_html = render_marked(text)
+    return posts
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('rebuild')")
+
+
+def optimize_index():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) "
+            "VALUES ('optimize')")
@@ -0,0 +1,154 @@
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from . import lookups, page_cache
+from .db import apply_sqlite_pragmas
+from .models import (AuthorStats, Category, Comment, Location, Post,
+                     deleting_posts)
+from .utils import (bump_author_stats, refresh_author_stats,
+                    reset_publication_boundary)
+
+connection_created.connect(apply_sqlite_pragmas)
+
+User = get_user_model()
+
+# Поля пользователя, которые выводятся в карточках постов и в профиле.
+USER_CARD_FIELDS = ('username', 'first_name', 'last_name')
+
+
+def _post_deleting(post_id):
+    # Каскад от удаления поста не должен по одному запросу на комментарий
+    # обновлять счётчики и сбрасывать кэш.
+    return post_id in (deleting_posts() or ())
+
+
+@receiver(pre_delete, sender=Post)
+def mark_post_deleting(sender, instance, **kwargs):
+    posts = deleting_posts()
+    if posts is not None:
+        posts[instance.pk] = set()
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance, **kwargs):
+    if _post_deleting(instance.post_id):
+        return
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def reset_boundary_on_post_change(sender, **kwargs):
+    reset_publication_boundary()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def purge_post_pages(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    if sender is Comment and _post_deleting(instance.post_id):
+        return
+    try:
+        post = instance if sender is Post else instance.post
+    except Post.DoesNotExist:
+        page_cache.purge_all()
+        return
+    page_cache.purge_post(post)
+    # Статистика автора комментария выводится в его профиле. Без
+    # загруженного автора профиль обновится по истечении кэша.
+    if sender is Comment and Comment.author.is_cached(instance):
+        page_cache.purge(f'profile:{instance.author.username}')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def bump_author_stats_on_create(sender, instance, created, raw=False,
+                                **kwargs):
+    if created and not raw:
+        bump_author_stats(
+            instance.author_id,
+            'post_count' if sender is Post else 'comment_count',
+            instance.created_at)
+
+
+@receiver(post_delete, sender=Comment)
+def refresh_author_stats_on_comment_delete(sender, instance, **kwargs):
+    if _post_deleting(instance.post_id):
+        # Каскад удаляет комментарии раньше поста: их авторы
+        # пересчитываются вместе с автором поста.
+        deleting_posts()[instance.post_id].add(instance.author_id)
+        return
+    refresh_author_stats([instance.author_id])
+
+
+@receiver(post_delete, sender=Post)
+def unmark_post_deleting(sender, instance, **kwargs):
+    commenters = (deleting_posts() or {}).pop(instance.pk, set())
+    refresh_author_stats({instance.author_id, *commenters})
+
+
+@receiver(post_save, sender=User)
+def create_author_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def purge_all_pages(sender, raw=False, **kwargs):
+    if not raw:
+        page_cache.purge_all()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_lookups(sender, **kwargs):
+    # Даже при загрузке фикстуры: справочники читаются из базы целиком.
+    lookups.invalidate()
+
+
+def _card_values(user):
+    # Отложенные поля не читаем: это запрос при каждой загрузке.
+    return tuple(user.__dict__.get(field) for field in USER_CARD_FIELDS)
+
+
+@receiver(post_init, sender=User)
+def remember_user_card(sender, instance, **kwargs):
+    instance._card_values = _card_values(instance)
+
+
+@receiver(post_save, sender=User)
+def purge_user_pages(sender, instance, created, raw=False,
+                     update_fields=None, **kwargs):
+    saved, instance._card_values = (
+        instance._card_values, _card_values(instance))
+    # Новый пользователь ещё не автор карточек, а вход обновляет только
+    # last_login — страницы не меняются.
+    if raw or created:
+        return
+    if update_fields is not None and not update_fields & set(
+            USER_CARD_FIELDS):
+        return
+    if saved == instance._card_values and None not in saved:
+        return
+    # Логин выводится в карточках на всех лентах, имя — в профиле.
+    page_cache.purge_all()
@@ -0,0 +1,73 @@
+"""Хранилище статики для collectstatic: хэши в именах, сжатие, чистка CSS.
+
+Перед хэшированием файлы из STATIC_PURGE_CSS заново чистятся из исходника
+(см. blog.css_purge), поэтому хэш меняется вместе с набором классов в
+шаблонах. После хэширования рядом с текстовыми файлами кладутся .gz и,
+если установлен пакет brotli, .br — их отдаёт StaticFilesMiddleware.
+"""
+import gzip
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from .constants import STATIC_COMPRESSIBLE_EXTENSIONS
+from .css_purge import Purger, used_tokens
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def compressors():
+    yield '.gz', lambda data: gzip.compress(data, 9, mtime=0)
+    if brotli is not None:
+        yield '.br', brotli.compress
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def stored_name(self, name):
+        # Без манифеста (collectstatic ещё не запускали) имена без хэша,
+        # но только при разработке: на бою это ошибка сборки.
+        if not self.hashed_files and settings.STATIC_MANIFEST_FALLBACK:
+            return name
+        return super().stored_name(name)
+
+    def replace(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
+
+    def purge(self, paths):
+        """Чистит CSS из исходников; хэшировать надо уже очищенную копию."""
+        purger = Purger(used_tokens(), settings.STATIC_PURGE_SAFELIST)
+        paths = dict(paths)
+        for name in settings.STATIC_PURGE_CSS:
+            if name not in paths:
+                continue
+            storage, path = paths[name]
+            with storage.open(path) as source:
+                css = source.read().decode()
+            self.replace(name, purger.purge(css).encode())
+            paths[name] = (self, name)
+        return paths
+
+    def compress(self, name):
+        with self.open(name) as source:
+            data = source.read()
+        for suffix, compress in compressors():
+            compressed = compress(data)
+            if len(compressed) < len(data):
+                self.replace(name + suffix, compressed)
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            yield from super().post_process(paths, dry_run, **options)
+            return
+        paths = self.purge(paths)
+        yield from super().post_process(paths, dry_run, **options)
+        for name in {*paths, *self.hashed_files.values()}:
+            if name.endswith(STATIC_COMPRESSIBLE_EXTENSIONS):
+                self.compress(name)
@@ -0,0 +1,14 @@
+from tasks.queue import task
+
+from .images import generate_variants
+from .models import Post
+from .routers import use_primary
+
+
+@task(name='blog.generate_image_variants')
+def generate_image_variants(post_id):
+    with use_primary():
+        post = Post.objects.select_related('author').filter(
+            pk=post_id).first()
+        if post is not None and post.image:
+            generate_variants(post)
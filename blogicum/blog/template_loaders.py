@@ -0,0 +1,107 @@
+"""Загрузчики шаблонов для боевого профиля TEMPLATE_PROFILE.
+
+InliningLoader подставляет текст шаблонов из ``{% include "имя" %}``
+с постоянным именем прямо в исходник, так что карточка поста в ленте
+не создаёт на каждый пост новый уровень контекста и состояние рендеринга.
+Поверх него стоит cached.Loader, а precompile_templates() при запуске
+процесса компилирует все шаблоны заранее.
+
+Подставляются только шаблоны без extends и block; include с only,
+с переменной вместо имени или с относительным путём остаются как есть.
+"""
+import logging
+import re
+from pathlib import Path
+
+from django.template import (Origin, TemplateDoesNotExist, TemplateSyntaxError,
+                             engines)
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders.base import Loader as BaseLoader
+from django.template.utils import get_app_template_dirs
+
+logger = logging.getLogger(__name__)
+
+INCLUDE_RE = re.compile(
+    r'{%\s*include\s+(?P<quote>["\'])(?P<name>[^"\'./][^"\']*)(?P=quote)'
+    r'(?:\s+with\s+(?P<extra>(?:(?!\bonly\b).)+?))?\s*%}')
+
+NOT_INLINABLE_RE = re.compile(r'{%\s*(?:extends|block)\b')
+
+
+class InliningLoader(BaseLoader):
+    """Оборачивает загрузчики и встраивает в шаблон статичные include."""
+
+    def __init__(self, engine, loaders):
+        super().__init__(engine)
+        self.loaders = engine.get_template_loaders(loaders)
+
+    def get_child_sources(self, template_name):
+        for loader in self.loaders:
+            yield from loader.get_template_sources(template_name)
+
+    def get_template_sources(self, template_name):
+        # cached.Loader читает исходник через origin.loader, поэтому
+        # origin должен указывать на этот загрузчик, а не на вложенный.
+        for source in self.get_child_sources(template_name):
+            origin = Origin(source.name, source.template_name, loader=self)
+            origin.source = source
+            yield origin
+
+    def get_contents(self, origin):
+        return self.inline(
+            origin.source.loader.get_contents(origin.source),
+            [origin.template_name])
+
+    def find_source(self, template_name):
+        for source in self.get_child_sources(template_name):
+            try:
+                return source.loader.get_contents(source)
+            except TemplateDoesNotExist:
+                continue
+        return None
+
+    def inline(self, source, stack):
+        def replace(match):
+            name = match['name']
+            if name in stack:
+                return match.group()
+            included = self.find_source(name)
+            if included is None or NOT_INLINABLE_RE.search(included):
+                return match.group()
+            included = self.inline(included, [*stack, name])
+            if match['extra']:
+                return (f'{{% with {match["extra"]} %}}'
+                        f'{included}{{% endwith %}}')
+            return included
+
+        return INCLUDE_RE.sub(replace, source)
+
+
+def template_names(directory):
+    directory = Path(directory)
+    for path in sorted(directory.rglob('*')):
+        if path.is_file() and not path.name.startswith('.'):
+            yield path.relative_to(directory).as_posix()
+
+
+def precompile_templates():
+    """Компилирует все шаблоны движков Django в их кэширующие загрузчики."""
+    compiled = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        # Имена из каталогов приложений, которых загрузчики не видят,
+        # просто не найдутся.
+        directories = [
+            *engine.engine.dirs, *get_app_template_dirs('templates')]
+        for directory in directories:
+            for name in template_names(directory):
+                try:
+                    engine.engine.get_template(name)
+                except (TemplateDoesNotExist, TemplateSyntaxError,
+                        UnicodeDecodeError) as e:
+                    # Например, шаблоны для не установленных библиотек.
+                    logger.debug('Шаблон %s не скомпилирован: %s', name, e)
+                    continue
+                compiled += 1
+    return compiled
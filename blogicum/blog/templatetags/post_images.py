@@ -0,0 +1,17 @@
+from django import template
+
+from blog.images import variant_name
+
+register = template.Library()
+
+
+@register.filter
+def srcset(post):
+    """Значение атрибута srcset для изображения поста."""
+    storage = post.image.storage
+    candidates = [
+        f'{storage.url(variant_name(post.image.name, width))} {width}w'
+        for width in post.image_meta['widths']
+    ]
+    candidates.append(f'{post.image.url} {post.image_meta["width"]}w')
+    return ', '.join(candidates)
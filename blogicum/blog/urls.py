@@ -1,24 +1,30 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import async_views, views
 
 app_name = 'blog'
 
+# Страницы для чтения; под ASGI их можно отдавать асинхронно.
+read_views = async_views if settings.ASYNC_VIEWS else views
+
 urlpatterns = [
-    path('', views.PostListView.as_view(), name='index'),
+    path('', read_views.PostListView.as_view(), name='index'),
     path('posts/<int:id>/',
-         views.PostDetailView.as_view(), name='post_detail'),
-    path('category/<slug:category_slug>/', views.CategoryListView.as_view(),
-         name='category_posts'),
+         read_views.PostDetailView.as_view(), name='post_detail'),
+    path('category/<slug:category_slug>/',
+         read_views.CategoryListView.as_view(), name='category_posts'),
     path('posts/create/', views.PostCreateView.as_view(), name='create_post'),
     path('posts/<int:id>/delete/',
          views.PostDeleteView.as_view(), name='delete_post'),
     path('profile/<slug:username>/',
-         views.UserListView.as_view(), name='profile'),
+         read_views.UserListView.as_view(), name='profile'),
     path('edit_profile/',
          views.UserUpdateViews.as_view(), name='edit_profile'),
     path('posts/<int:id>/edit/',
          views.PostUpdateView.as_view(), name='edit_post'),
+    path('posts/<int:id>/comments/',
+         views.CommentListView.as_view(), name='comments'),
     path('posts/<int:post_id>/comment/',
          views.add_comment, name='add_comment'),
     path('posts/<int:post_id>/edit_comment/<int:comment_id>/',
@@ -26,4 +32,6 @@ urlpatterns = [
     path('posts/<int:post_id>/delete_comment/<int:comment_id>/',
          views.CommentDeleteView.as_view(),
          name='delete_comment'),
+    path('search/', views.SearchView.as_view(), name='search'),
+    path('export/<slug:kind>/', views.export, name='export'),
 ]
@@ -1,25 +1,146 @@
-from django.db.models import Count
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, F, Max, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
+from .constants import (PUBLICATION_BOUNDARY_CACHE_KEY,
+                        PUBLICATION_BOUNDARY_MAX_AGE, RECOUNT_BATCH_SIZE)
+from .lookups import unpublished_category_ids
+from .models import AuthorStats, Comment, Post
+
+User = get_user_model()
+
 
 def get_query_all_posts(model):
     return model.select_related(
-        'category',
-        'location',
         'author'
-    ).annotate(
-        comment_count=Count('comments')
-    ).order_by('-pub_date')
+    ).with_lookups().order_by('-pub_date', '-id')
 
 
 def get_query_published_posts(model):
     return get_query_all_posts(model).filter(
         is_published=True,
         pub_date__lt=timezone.now(),
-        category__is_published=True
-    )
+        category__isnull=False
+    ).exclude(category_id__in=unpublished_category_ids())
+
+
+def get_publication_boundary():
+    """Момент выхода ближайшего отложенного поста или None.
+
+    Значение общее для всех процессов и хранится в кэше до самой границы,
+    так что до неё опубликованная часть лент гарантированно не меняется
+    от одного лишь течения времени.
+    """
+    now = timezone.now()
+    # Промах кэша равносилен уже наступившей границе.
+    boundary = cache.get(PUBLICATION_BOUNDARY_CACHE_KEY, now)
+    if boundary is not None and boundary <= now:
+        boundary = Post.objects.filter(
+            is_published=True, pub_date__gte=now
+        ).aggregate(boundary=Min('pub_date'))['boundary']
+        cache.set(
+            PUBLICATION_BOUNDARY_CACHE_KEY, boundary,
+            publication_timeout(PUBLICATION_BOUNDARY_MAX_AGE, boundary, now))
+    return boundary
+
+
+def publication_timeout(max_age, boundary=None, now=None):
+    """Сколько секунд кэш ленты остаётся верным: не дольше max_age."""
+    if boundary is None:
+        return max_age
+    now = now or timezone.now()
+    return max(0, min(max_age, int((boundary - now).total_seconds()) + 1))
+
+
+def reset_publication_boundary():
+    cache.delete(PUBLICATION_BOUNDARY_CACHE_KEY)
 
 
 def get_object_from_query(model, **kwargs):
     return get_object_or_404(model, **kwargs)
+
+
+def recount_comment_counts(post_ids=None, dry_run=False):
+    """Чинит расхождения Post.comment_count; возвращает число таких постов."""
+    posts = Post.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    drifted = list(posts.annotate(
+        actual=Count('comments')
+    ).exclude(comment_count=F('actual')).values_list('pk', flat=True))
+    if drifted and not dry_run:
+        actual = Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by().values('post').annotate(total=Count('pk')).values('total')
+        for start in range(0, len(drifted), RECOUNT_BATCH_SIZE):
+            Post.objects.filter(
+                pk__in=drifted[start:start + RECOUNT_BATCH_SIZE]
+            ).update(comment_count=Coalesce(Subquery(actual), 0))
+    return len(drifted)
+
+
+def _by_author(model, aggregate):
+    return Subquery(model.objects.filter(
+        author=OuterRef('user')
+    ).order_by().values('author').annotate(
+        value=aggregate).values('value'))
+
+
+def author_stats_values():
+    """Выражения для точных значений строки AuthorStats."""
+    last_post = _by_author(Post, Max('created_at'))
+    last_comment = _by_author(Comment, Max('created_at'))
+    return {
+        'post_count': Coalesce(_by_author(Post, Count('pk')), 0),
+        'comment_count': Coalesce(_by_author(Comment, Count('pk')), 0),
+        # Greatest на SQLite даёт NULL, если NULL хоть один аргумент.
+        'last_activity': Greatest(
+            Coalesce(last_post, last_comment),
+            Coalesce(last_comment, last_post)),
+    }
+
+
+def refresh_author_stats(user_ids):
+    """Пересчитывает строки авторов одним UPDATE."""
+    AuthorStats.objects.filter(user_id__in=user_ids).update(
+        **author_stats_values())
+
+
+def bump_author_stats(user_id, counter, at):
+    """Учитывает новый пост или комментарий автора."""
+    updated = AuthorStats.objects.filter(user_id=user_id).update(
+        **{counter: F(counter) + 1}, last_activity=at)
+    if not updated:
+        recount_author_stats(user_ids=[user_id])
+
+
+def recount_author_stats(user_ids=None, dry_run=False):
+    """Чинит строки AuthorStats; возвращает число неверных или пропавших."""
+    users = User.objects.all()
+    if user_ids is not None:
+        users = users.filter(pk__in=user_ids)
+    missing = list(users.filter(stats__isnull=True).values_list(
+        'pk', flat=True))
+    if missing and not dry_run:
+        AuthorStats.objects.bulk_create(
+            (AuthorStats(user_id=pk) for pk in missing),
+            batch_size=RECOUNT_BATCH_SIZE, ignore_conflicts=True)
+    stats = AuthorStats.objects.all()
+    if user_ids is not None:
+        stats = stats.filter(user_id__in=user_ids)
+    actual = author_stats_values()
+    drifted = list(stats.annotate(
+        **{f'actual_{name}': value for name, value in actual.items()}
+    ).exclude(
+        Q(post_count=F('actual_post_count'))
+        & Q(comment_count=F('actual_comment_count'))
+        & (Q(last_activity=F('actual_last_activity'))
+           | Q(last_activity__isnull=True, actual_last_activity__isnull=True))
+    ).values_list('pk', flat=True))
+    if drifted and not dry_run:
+        for start in range(0, len(drifted), RECOUNT_BATCH_SIZE):
+            refresh_author_stats(drifted[start:start + RECOUNT_BATCH_SIZE])
+    return len(missing) + len(set(drifted) - set(missing))
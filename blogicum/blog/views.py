@@ -1,16 +1,31 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import Http404
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import InvalidPage
+from django.db.models import OuterRef, Subquery
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import redirect
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.http import urlencode
 from django.views.generic import (CreateView, DeleteView, DetailView, ListView,
                                   UpdateView)
 
-from .constants import PAGINATE_PAGE_COUNT
+from .conditional import ConditionalGetMixin
+from .constants import (COMMENTS_PAGE_SIZE, PAGINATE_PAGE_COUNT,
+                        SEARCH_CANDIDATES)
+from .db import retry_on_locked
+from .export import EXPORT_FIELDS, export_rows, ndjson_lines, parse_watermark
 from .forms import CommentForm, PostCreateForm, UserCreateForm
+from .lookups import get_published_category
 from .models import Category, Comment, Post
+from .page_cache import AnonymousPageCacheMixin
+from .paginators import CommentPaginator, CursorPaginator
+from .search import attach_highlights, search_is_truncated, search_posts
+from .tasks import generate_image_variants
 from .utils import (get_object_from_query, get_query_all_posts,
                     get_query_published_posts)
 
@@ -24,29 +39,95 @@ class SuccessURLMixin:
         )
 
 
-class UserListView(ListView):
+class SingleObjectOnceMixin:
+    """Загружает объект один раз за запрос и отдаёт его всем потребителям."""
+
+    def get_object(self, queryset=None):
+        if not hasattr(self, '_object'):
+            self._object = super().get_object(queryset)
+        return self._object
+
+
+class AuthorRequiredMixin(SingleObjectOnceMixin):
+    """Пускает к объекту только его автора, остальных перенаправляет.
+
+    Проверка идёт по author_id уже загруженного объекта, без запроса к
+    таблице пользователей.
+    """
+
+    def get_author_redirect_url(self):
+        return reverse('blog:index')
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.get_object().author_id != request.user.id:
+            return redirect(self.get_author_redirect_url())
+        return super().dispatch(request, *args, **kwargs)
+
+
+class CursorPaginationMixin:
+    """Курсорная пагинация; ссылки вида ?page=N обслуживаются по-старому."""
+
+    cursor_kwarg = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.page_kwarg in self.request.GET:
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidPage as e:
+            raise Http404(str(e))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class TemplateEngineMixin:
+    """Рендерит страницу движком из настройки BLOG_TEMPLATE_ENGINE."""
+
+    @property
+    def template_engine(self):
+        return settings.BLOG_TEMPLATE_ENGINE
+
+
+class UserListView(ConditionalGetMixin, AnonymousPageCacheMixin,
+                   CursorPaginationMixin, TemplateEngineMixin, ListView):
     model = Post
     author = None
     template_name = 'blog/profile.html'
     paginate_by = PAGINATE_PAGE_COUNT
     slug_url_kwargs = 'username'
-    queryset = get_query_all_posts(model.objects)
+    page_cache_groups = ('profile:{username}',)
+
+    def is_owner(self):
+        return (self.request.user.get_username()
+                == self.kwargs[self.slug_url_kwargs])
+
+    def get_validator_scope(self):
+        return [*super().get_validator_scope(), self.is_owner()]
+
+    def get_newest_timestamps(self):
+        # Автор видит все свои посты сразу, отложенные тоже: его страница
+        # меняется только вместе с поколениями кэша.
+        if self.is_owner():
+            return []
+        return [get_query_published_posts(Post.objects.filter(
+            author__username=self.kwargs[self.slug_url_kwargs]
+        )).values_list('pub_date', flat=True).first()]
 
     def get_object(self):
         return get_object_from_query(
-            User,
+            User.objects.select_related('stats'),
             username=self.kwargs[self.slug_url_kwargs])
 
     def get_queryset(self):
         self.author = self.get_object()
         if self.author == self.request.user:
-            return self.queryset.filter(author=self.author)
-        return super().get_queryset().filter(
-            author=self.author, is_published=True)
+            return get_query_all_posts(self.author.posts)
+        return get_query_published_posts(self.author.posts)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['profile'] = self.get_object()
+        context['profile'] = self.author
+        context['is_owner'] = self.is_owner()
         return context
 
 
@@ -59,66 +140,125 @@ class UserUpdateViews(SuccessURLMixin, LoginRequiredMixin, UpdateView):
         return self.request.user
 
 
-class PostListView(ListView):
+class PostListView(ConditionalGetMixin, AnonymousPageCacheMixin,
+                   CursorPaginationMixin, TemplateEngineMixin, ListView):
     model = Post
     template_name = 'blog/index.html'
     ordering = '-created_at'
     paginate_by = PAGINATE_PAGE_COUNT
-    queryset = get_query_published_posts(model.objects)
+    page_cache_groups = ('index',)
+
+    def get_newest_timestamps(self):
+        return [get_query_published_posts(Post.objects).values_list(
+            'pub_date', flat=True).first()]
 
     def get_queryset(self):
-        return self.queryset  # если убрать функцию, то не проходит тесты
+        # Момент публикации берётся на каждый запрос, а не при импорте.
+        return get_query_published_posts(self.model.objects)
 
 
-class PostDetailView(DetailView):
+class PostDetailView(ConditionalGetMixin, AnonymousPageCacheMixin,
+                     SingleObjectOnceMixin, TemplateEngineMixin, DetailView):
     model = Post
     template_name = 'blog/detail.html'
     pk_url_kwarg = 'id'
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        post = get_object_from_query(
-            Post,
-            id=self.kwargs[self.pk_url_kwarg]
-        )
-        if post.author != self.request.user:
+    page_cache_groups = ('post:{id}',)
+
+    queryset = Post.objects.select_related('author').with_lookups()
+
+    def get_newest_timestamps(self):
+        last_comment = Comment.objects.filter(
+            post=OuterRef('pk')
+        ).order_by('-created_at').values('created_at')[:1]
+        return Post.objects.filter(
+            pk=self.kwargs[self.pk_url_kwarg]
+        ).annotate(
+            last_comment=Subquery(last_comment)
+        ).values_list('pub_date', 'last_comment').first() or []
+
+    def get_object(self, queryset=None):
+        post = super().get_object(queryset)
+        if post.author_id != self.request.user.id:
             if not (post.is_published
                     and post.category.is_published
                     and post.pub_date <= timezone.now()):
                 raise Http404('Page not published')
-        context['comments'] = post.comments.select_related(
-            'author')
+        return post
+
+    def get_comments(self, cursor=None):
+        paginator = CommentPaginator(
+            self.object.comments.select_related('author'),
+            COMMENTS_PAGE_SIZE)
+        try:
+            return paginator.page(cursor)
+        except InvalidPage as e:
+            raise Http404(str(e))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments'] = self.get_comments()
         context['form'] = CommentForm()
         return context
 
 
-class CategoryListView(ListView):
+class CommentListView(PostDetailView):
+    """Следующая порция комментариев поста HTML-фрагментом."""
+
+    template_name = 'includes/comment_list.html'
+
+    def get_context_data(self, **kwargs):
+        return {
+            'post': self.object,
+            'comments': self.get_comments(self.request.GET.get('cursor')),
+        }
+
+
+class CategoryListView(ConditionalGetMixin, AnonymousPageCacheMixin,
+                       CursorPaginationMixin, TemplateEngineMixin, ListView):
     model = Category
     template_name = 'blog/category.html'
     slug_url_kwarg = 'category_slug'
     category = None
     paginate_by = PAGINATE_PAGE_COUNT
+    page_cache_groups = ('categories', 'category:{category_slug}')
+
+    def get_newest_timestamps(self):
+        category = get_published_category(self.kwargs[self.slug_url_kwarg])
+        return [category.created_at, get_query_published_posts(
+            category.posts).values_list('pub_date', flat=True).first()]
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-
-        self.category = get_object_from_query(
-            self.model,
-            slug=self.kwargs[self.slug_url_kwarg],
-            is_published=True
-        )
         context['category'] = self.category
         return context
 
     def get_queryset(self, *args, **kwargs):
-        self.category = get_object_from_query(
-            self.model,
-            slug=self.kwargs[self.slug_url_kwarg],
-            is_published=True
-        )
+        self.category = get_published_category(
+            self.kwargs[self.slug_url_kwarg])
         return get_query_published_posts(self.category.posts)
 
 
+class SearchView(ListView):
+    """Поиск по опубликованным постам, лучшие совпадения первыми."""
+
+    template_name = 'blog/search.html'
+    paginate_by = PAGINATE_PAGE_COUNT
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        return search_posts(self.query)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        attach_highlights(context['page_obj'], self.query)
+        context['query'] = self.query
+        context['paginator_query'] = urlencode({'q': self.query}) + '&'
+        context['search_truncated'] = search_is_truncated(
+            self.query, context['paginator'].count)
+        context['search_candidates'] = SEARCH_CANDIDATES
+        return context
+
+
 class PostCreateView(SuccessURLMixin, LoginRequiredMixin, CreateView):
     model = Post
     form_class = PostCreateForm
@@ -126,11 +266,15 @@ class PostCreateView(SuccessURLMixin, LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.author = self.request.user
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        if self.object.image:
+            generate_image_variants.delay(self.object.pk)
+        return response
 
 
-class PostUpdateView(LoginRequiredMixin, UpdateView):
+class PostUpdateView(AuthorRequiredMixin, LoginRequiredMixin, UpdateView):
     model = Post
+    queryset = Post.objects.select_related('author')
     form_class = PostCreateForm
     template_name = 'blog/create.html'
     pk_url_kwarg = 'id'
@@ -140,47 +284,45 @@ class PostUpdateView(LoginRequiredMixin, UpdateView):
             'blog:post_detail',
             kwargs={'id': self.kwargs[self.pk_url_kwarg]})
 
-    def dispatch(self, request, *args, **kwargs):
-        instance = get_object_from_query(
-            Post, id=self.kwargs[self.pk_url_kwarg])
+    def form_valid(self, form):
+        image_changed = 'image' in form.changed_data
+        if image_changed:
+            form.instance.image_meta = {}
+        response = super().form_valid(form)
+        if image_changed and self.object.image:
+            generate_image_variants.delay(self.object.pk)
+        return response
 
-        if instance.author != request.user:
-            return redirect(self.get_success_url())
-        return super().dispatch(request, *args, **kwargs)
+    def get_author_redirect_url(self):
+        return self.get_success_url()
 
 
-class PostDeleteView(LoginRequiredMixin, DeleteView):
+class PostDeleteView(AuthorRequiredMixin, LoginRequiredMixin, DeleteView):
     model = Post
+    queryset = Post.objects.select_related('author')
     form_class = PostCreateForm
     template_name = 'blog/create.html'
     success_url = reverse_lazy('blog:index')
     pk_url_kwarg = 'id'
 
-    def dispatch(self, request, *args, **kwargs):
-        instance = get_object_from_query(Post, id=kwargs[self.pk_url_kwarg])
-        if instance.author != request.user:
-            return redirect('blog:index')
-        return super().dispatch(request, *args, **kwargs)
-
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = self.form_class(instance=self.object)
         return context
 
 
-class CommentMixin(LoginRequiredMixin):
+class CommentMixin(AuthorRequiredMixin, LoginRequiredMixin):
     model = Comment
+    # Пост с автором нужны сигналу, сбрасывающему кэш страниц поста.
+    queryset = Comment.objects.select_related('post__author', 'author')
     form_class = CommentForm
     template_name = 'blog/comment.html'
     success_url = reverse_lazy('blog:index')
     pk_url_kwarg = 'comment_id'
 
-    def dispatch(self, request, *args, **kwargs):
-        instance = get_object_from_query(Comment, id=kwargs[self.pk_url_kwarg])
-
-        if instance.author != request.user:
-            return redirect('blog:index')
-        return super().dispatch(request, *args, **kwargs)
+    @method_decorator(retry_on_locked)
+    def post(self, request, *args, **kwargs):
+        return super().post(request, *args, **kwargs)
 
 
 class CommentUpdateView(CommentMixin, UpdateView):
@@ -192,8 +334,10 @@ class CommentDeleteView(CommentMixin, DeleteView):
 
 
 @login_required
+@retry_on_locked
 def add_comment(request, post_id):
-    post = get_object_from_query(Post, id=post_id)
+    post = get_object_from_query(
+        Post.objects.select_related('author'), id=post_id)
 
     form = CommentForm(request.POST)
     if form.is_valid():
@@ -202,3 +346,22 @@ def add_comment(request, post_id):
         comment.post = post
         comment.save()
     return redirect('blog:post_detail', post_id)
+
+
+@login_required
+def export(request, kind):
+    """Выгрузка для аналитики: NDJSON, по строке на объект, только staff."""
+    if not request.user.is_staff:
+        raise PermissionDenied
+    if kind not in EXPORT_FIELDS:
+        raise Http404(f'Нет выгрузки {kind}')
+    try:
+        filters = parse_watermark(
+            request.GET.get('since_id'), request.GET.get('since'))
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    response = StreamingHttpResponse(
+        ndjson_lines(export_rows(kind, **filters)),
+        content_type='application/x-ndjson; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{kind}.ndjson"'
+    return response
@@ -8,7 +8,10 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static_dev',
 ]
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = 'tasks.backends.QueuedEmailBackend'
+
+# Backend that actually delivers mail queued by tasks.backends.
+TASKS_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
@@ -41,11 +44,15 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'blog.apps.BlogConfig',
     'pages.apps.PagesConfig',
+    'tasks.apps.TasksConfig',
     'django_bootstrap5',
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.QueryBudgetMiddleware',
+    'blog.middleware.ReplicaStickinessMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'blog.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -56,6 +63,51 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'blogicum.urls'
 
+# Query budgets per URL name, enforced by blog.middleware.QueryBudgetMiddleware.
+# Budgets cover the whole request, including session and user lookups,
+# and both GET and a successful POST; see tests/test_object_resolution.py.
+# Category and location tables are assumed loaded (blog.lookups): after
+# they change or LOOKUP_LOCAL_TIMEOUT passes, the first request in each
+# process spends two more queries.
+# Pages with ETags (blog.conditional) include the one query for their
+# validators, which runs only until it is cached. Comment writes add the
+# BEGIN of their blog.db.retry_on_locked transaction. A search that fills
+# its candidate window adds one query checking for older matches.
+QUERY_BUDGETS = {
+    'blog:index': 4,
+    'blog:post_detail': 5,
+    'blog:comments': 5,
+    'blog:category_posts': 4,
+    'blog:create_post': 8,
+    'blog:delete_post': 7,
+    'blog:profile': 5,
+    'blog:edit_profile': 4,
+    'blog:edit_post': 8,
+    'blog:add_comment': 7,
+    'blog:edit_comment': 5,
+    'blog:delete_comment': 7,
+    'blog:search': 5,
+    # Rows are streamed after the view returns and are not counted here.
+    'blog:export': 2,
+}
+
+# Count queries per request and log budget overruns and N+1 patterns.
+QUERY_BUDGET_ENABLED = True
+
+# Share of requests counted. Production samples to keep the per-query
+# wrapper off most requests; an overrun still shows up in the log.
+QUERY_BUDGET_SAMPLE_RATE = 1.0 if DEBUG else 0.1
+
+# Report the query count and DB time in a Server-Timing response header.
+QUERY_BUDGET_SERVER_TIMING = DEBUG
+
+# Same SQL repeated this many times within one request is reported as N+1.
+QUERY_BUDGET_REPEAT_THRESHOLD = 3
+
+# Raise QueryBudgetExceeded instead of logging a warning. For development
+# and tests only: in production an overrun must not fail the request.
+QUERY_BUDGET_RAISE = False
+
 LOGIN_REDIRECT_URL = 'blog:index'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
@@ -74,10 +126,47 @@ TEMPLATES = [
             ],
         },
     },
+    {
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [BASE_DIR / 'jinja2'],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'blog.jinja_env.environment',
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+            ],
+        },
+    },
 ]
 
+BLOG_TEMPLATE_ENGINE = 'django'
+# Engine rendering the feed, category, profile and post pages: 'django' or
+# 'jinja2'. The Jinja2 copies in jinja2/ must stay byte-identical to the
+# DTL templates, see tests/test_jinja2_parity.py.
+
+TEMPLATE_PROFILE = 'development' if DEBUG else 'production'
+# 'production' compiles every template once per process at startup and
+# inlines static includes, see blog.template_loaders; templates edited on
+# disk are then picked up only after a restart, so it follows DEBUG.
+
+if TEMPLATE_PROFILE == 'production':
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            ('blog.template_loaders.InliningLoader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ]),
+    ]
+
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
+ASYNC_VIEWS = False
+# Route the feed, category, post and profile pages to blog.async_views.
+# Only useful when serving blogicum.asgi:application; under WSGI every
+# async view pays for its own event loop. Compare with bench_asgi.
+
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
@@ -86,9 +175,126 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep connections between requests so pragmas are applied once.
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            # Seconds the sqlite3 module waits for a lock before giving up.
+            'timeout': 20,
+        },
     }
 }
 
+# Applied to every new SQLite connection by blog.db.apply_sqlite_pragmas.
+# WAL lets readers proceed while a write is in progress; NORMAL
+# synchronous is durable in WAL mode except on power loss.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 20000,
+    # 64 MiB page cache (negative values are KiB) and 256 MiB mmap.
+    'cache_size': -64 * 1024,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
+}
+
+# Writes wrapped in blog.db.retry_on_locked are retried this many times,
+# starting SQLITE_LOCK_RETRY_DELAY seconds apart and doubling.
+SQLITE_LOCK_RETRIES = 3
+
+SQLITE_LOCK_RETRY_DELAY = 0.05
+
+# Read replicas, see blog.routers. Add aliases to DATABASES and list them
+# here to send reads of REPLICA_APP_LABELS models to them.
+DATABASE_ROUTERS = ['blog.routers.ReplicaRouter']
+
+DATABASE_REPLICAS = []
+
+REPLICA_APP_LABELS = ('blog', 'pages')
+
+# After a write, the user's reads go to the primary for this many seconds.
+REPLICA_STICKY_SECONDS = 15
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Rendered includes/post_card.html fragments. Keys are versioned by
+    # Post.card_version, so stale entries are never served and only need to
+    # age out. FileBasedCache with a LOCATION works here as well.
+    'post_cards': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'post-cards',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # Session data for the cached_db engine, see SESSION_ENGINE.
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+    },
+}
+
+
+# With a per-process default cache, category and location tables
+# (blog.lookups) are reloaded at least this often, in seconds: other
+# processes do not see the version bump of an admin edit.
+LOOKUP_LOCAL_TIMEOUT = 30
+
+
+# Whole-page cache for anonymous readers, see blog.page_cache.
+PAGE_CACHE_ALIAS = 'default'
+
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Cap for pages, their generations and validators when PAGE_CACHE_ALIAS is
+# a per-process cache such as LocMemCache: other processes do not see its
+# purges and may serve a stale page for this many seconds. With several
+# processes point PAGE_CACHE_ALIAS at a shared cache (Redis, Memcached).
+PAGE_CACHE_LOCAL_TIMEOUT = 30
+
+# Count page cache hits and misses per route in blog.page_cache.stats.
+PAGE_CACHE_STATS = False
+
+# Count 304 and full responses per route in blog.conditional.stats.
+CONDITIONAL_GET_STATS = False
+
+
+# Sessions. Anonymous readers never get one: CSRF and messages use cookies.
+# A logged-in reader costs one django_session query per request with the
+# database engine (counted in QUERY_BUDGETS); both alternatives save it:
+# - 'django.contrib.sessions.backends.cached_db' reads the 'sessions' cache
+#   first and writes through to the database. The cache is per process, so
+#   with several processes point it at a shared cache, or a logout in one
+#   process leaves the session alive in the others until it expires.
+# - 'django.contrib.sessions.backends.signed_cookies' keeps the data in the
+#   cookie; a session cannot be revoked on the server side.
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+
+SESSION_CACHE_ALIAS = 'sessions'
+
+# `manage.py run_tasks` deletes expired sessions this often, in seconds.
+SESSION_CLEANUP_INTERVAL = 60 * 60
+
+
+# Background tasks, see tasks.queue.
+# Run jobs synchronously inside enqueue().
+TASKS_EAGER = False
+
+# Run jobs in this process's thread pool right after the transaction
+# commits; `manage.py run_tasks` picks up whatever is left.
+TASKS_RUN_IN_PROCESS = True
+
+TASKS_THREADS = 2
+
+# Base retry delay in seconds, doubled on each failed attempt.
+TASKS_RETRY_DELAY = 5
+
+# Jobs running longer than this many seconds are considered lost.
+TASKS_STALE_AFTER = 60 * 10
+
+# Finished jobs are deleted after this many seconds.
+TASKS_KEEP_DONE = 60 * 60 * 24
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -128,6 +334,28 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+STATIC_ROOT = BASE_DIR / 'static'
+# Where collectstatic gathers files for deployment.
+
+STATICFILES_STORAGE = 'blog.staticfiles.CompressedManifestStaticFilesStorage'
+# Content-hashed names plus .gz (and .br with the brotli package) copies.
+
+STATIC_MANIFEST_FALLBACK = DEBUG
+# Until collectstatic has written a manifest, URLs keep the plain names;
+# otherwise a missing manifest entry is an error, as in Django itself.
+
+STATIC_PURGE_CSS = ['css/bootstrap.min.css']
+# Stylesheets collectstatic strips of rules for classes no template uses,
+# see blog.css_purge; run "manage.py purge_css" to preview the result.
+
+STATIC_PURGE_SAFELIST = [r'^alert-', r'-(sm|lg)$']
+# Classes django_bootstrap5 builds at runtime rather than spelling out.
+
+SERVE_STATIC = False
+# Serve STATIC_ROOT from Django itself with far-future caching, for
+# deployments without a web server in front, see
+# blog.middleware.StaticFilesMiddleware.
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
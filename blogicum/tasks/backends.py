@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .tasks import send_email
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Отправляет письма фоновой задачей через TASKS_EMAIL_BACKEND."""
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            if message.attachments:
+                # Вложения не сериализуются в JSON — отправляем сразу.
+                get_connection(settings.TASKS_EMAIL_BACKEND).send_messages(
+                    [message])
+                continue
+            send_email.delay({
+                'subject': message.subject,
+                'body': message.body,
+                'from_email': message.from_email,
+                'to': message.to,
+                'cc': message.cc,
+                'bcc': message.bcc,
+                'reply_to': message.reply_to,
+                'headers': message.extra_headers,
+                'alternatives': getattr(message, 'alternatives', []),
+            })
+        return len(email_messages)
@@ -0,0 +1,5 @@
+MAX_LENGTH_TASK_NAME = 128
+# Maximum length of a registered task name
+
+DEFAULT_MAX_ATTEMPTS = 3
+# How many times a failing job is tried before it is marked failed
@@ -0,0 +1,73 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from tasks.queue import due_jobs, prune_done, requeue_stale, run_job
+
+
+def _run(job_id):
+    close_old_connections()
+    try:
+        run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def _clear_expired_sessions():
+    # Как clearsessions: движок без clear_expired пропускаем.
+    engine = import_module(settings.SESSION_ENGINE)
+    try:
+        engine.SessionStore.clear_expired()
+    except NotImplementedError:
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет фоновые задачи из очереди; раз в '
+        'SESSION_CLEANUP_INTERVAL секунд удаляет истёкшие сессии.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить то, что уже в очереди, и выйти.')
+        parser.add_argument(
+            '--threads', type=int, default=settings.TASKS_THREADS,
+            help='Размер пула потоков.')
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Пауза в секундах, когда очередь пуста.')
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        # С одним потоком задачи выполняются прямо в потоке команды.
+        pool = ThreadPoolExecutor(max_workers=threads) if threads > 1 else None
+        run_batch = pool.map if pool else map
+        done = 0
+        clear_sessions_at = 0
+        try:
+            while True:
+                # До пачки задач: при постоянной нагрузке очередь не
+                # пустеет, а сессии всё равно надо чистить.
+                if time.monotonic() >= clear_sessions_at:
+                    _clear_expired_sessions()
+                    clear_sessions_at = (
+                        time.monotonic() + settings.SESSION_CLEANUP_INTERVAL)
+                requeue_stale()
+                jobs = due_jobs(limit=threads * 4)
+                list(run_batch(_run, jobs))
+                done += len(jobs)
+                if jobs:
+                    continue
+                prune_done()
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        finally:
+            if pool:
+                pool.shutdown()
+        self.stdout.write(self.style.SUCCESS(f'Выполнено задач: {done}'))
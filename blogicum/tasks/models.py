@@ -0,0 +1,57 @@
+from django.db import models
+from django.utils import timezone
+
+from .constants import DEFAULT_MAX_ATTEMPTS, MAX_LENGTH_TASK_NAME
+
+
+class Job(models.Model):
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Выполнена'
+        FAILED = 'failed', 'Ошибка'
+
+    name = models.CharField(
+        max_length=MAX_LENGTH_TASK_NAME,
+        verbose_name='Задача')
+    payload = models.JSONField(
+        default=dict,
+        verbose_name='Аргументы')
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name='Состояние')
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток')
+    max_attempts = models.PositiveSmallIntegerField(
+        default=DEFAULT_MAX_ATTEMPTS,
+        verbose_name='Максимум попыток')
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Не раньше')
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка')
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Добавлено')
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Начата')
+
+    class Meta:
+        verbose_name = 'задача'
+        verbose_name_plural = 'Задачи'
+        ordering = ('run_after', 'id')
+        indexes = (
+            models.Index(
+                fields=('run_after', 'id'),
+                condition=models.Q(status='pending'),
+                name='job_pending_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,153 @@
+"""Очередь фоновых задач на таблице Job, без внешнего брокера.
+
+Задача ставится в очередь записью в таблицу и после фиксации транзакции
+выполняется в пуле потоков этого же процесса. Команда run_tasks подбирает
+всё, что процесс не успел выполнить: отложенные повторы, задачи
+упавших процессов или поставленные при TASKS_RUN_IN_PROCESS = False.
+"""
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .constants import DEFAULT_MAX_ATTEMPTS
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class Task:
+    def __init__(self, func, name, max_attempts):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return enqueue(self.name, *args, **kwargs)
+
+
+def task(func=None, *, name=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """Регистрирует функцию как задачу; аргументы должны быть JSON."""
+    def register(func):
+        registered = Task(
+            func, name or f'{func.__module__}.{func.__name__}', max_attempts)
+        _registry[registered.name] = registered
+        return registered
+    return register(func) if func is not None else register
+
+
+def enqueue(name, *args, **kwargs):
+    if name not in _registry:
+        raise LookupError(f'Задача {name} не зарегистрирована')
+    job = Job.objects.create(
+        name=name,
+        payload={'args': list(args), 'kwargs': kwargs},
+        max_attempts=_registry[name].max_attempts)
+    if settings.TASKS_EAGER:
+        run_job(job.pk)
+    elif settings.TASKS_RUN_IN_PROCESS:
+        transaction.on_commit(lambda: submit(job.pk))
+    return job
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.TASKS_THREADS,
+                thread_name_prefix='tasks')
+    return _executor
+
+
+def submit(job_id, delay=0):
+    if delay:
+        timer = threading.Timer(delay, submit, (job_id,))
+        timer.daemon = True
+        timer.start()
+        return
+    get_executor().submit(run_in_thread, job_id)
+
+
+def run_in_thread(job_id):
+    close_old_connections()
+    try:
+        retry_in = run_job(job_id)
+    finally:
+        close_old_connections()
+    if retry_in is not None and settings.TASKS_RUN_IN_PROCESS:
+        submit(job_id, retry_in)
+
+
+def claim(job_id):
+    now = timezone.now()
+    return Job.objects.filter(
+        pk=job_id, status=Job.Status.PENDING, run_after__lte=now
+    ).update(
+        status=Job.Status.RUNNING,
+        started_at=now,
+        attempts=F('attempts') + 1) == 1
+
+
+def run_job(job_id):
+    """Выполняет задачу, если её удалось захватить.
+
+    Возвращает задержку в секундах до повторной попытки или None.
+    """
+    if not claim(job_id):
+        return None
+    job = Job.objects.get(pk=job_id)
+    try:
+        _registry[job.name](
+            *job.payload.get('args', ()), **job.payload.get('kwargs', {}))
+    except Exception:
+        logger.exception('Задача %s упала (попытка %s)', job, job.attempts)
+        jobs = Job.objects.filter(pk=job_id)
+        error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            jobs.update(status=Job.Status.FAILED, last_error=error)
+            return None
+        delay = settings.TASKS_RETRY_DELAY * 2 ** (job.attempts - 1)
+        jobs.update(
+            status=Job.Status.PENDING,
+            last_error=error,
+            run_after=timezone.now() + timedelta(seconds=delay))
+        return delay
+    Job.objects.filter(pk=job_id).update(status=Job.Status.DONE)
+    return None
+
+
+def due_jobs(limit):
+    return list(Job.objects.filter(
+        status=Job.Status.PENDING, run_after__lte=timezone.now()
+    ).values_list('pk', flat=True)[:limit])
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи, зависшие в процессе, который умер."""
+    return Job.objects.filter(
+        status=Job.Status.RUNNING,
+        started_at__lt=timezone.now() - timedelta(
+            seconds=settings.TASKS_STALE_AFTER)
+    ).update(status=Job.Status.PENDING)
+
+
+def prune_done():
+    return Job.objects.filter(
+        status=Job.Status.DONE,
+        started_at__lt=timezone.now() - timedelta(
+            seconds=settings.TASKS_KEEP_DONE)
+    ).delete()[0]
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+from .queue import task
+
+
+@task(name='tasks.send_email')
+def send_email(message):
+    alternatives = message.pop('alternatives')
+    email = EmailMultiAlternatives(**message)
+    for content, mimetype in alternatives:
+        email.attach_alternative(content, mimetype)
+    get_connection(settings.TASKS_EMAIL_BACKEND).send_messages([email])
@@ -1,6 +1,8 @@
+import importlib
 import os
 import re
 import time
+from contextlib import contextmanager
 from http import HTTPStatus
 from inspect import getsource
 from pathlib import Path
@@ -18,12 +20,15 @@ from typing import (
 
 import pytest
 from django.apps import apps
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
 from django.test import override_settings
 from django.test.client import Client
+from django.urls import clear_url_caches
 from mixer.backend.django import mixer as _mixer
 
 N_PER_FIXTURE = 3
@@ -41,6 +46,38 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def eager_tasks():
+    # Фоновые потоки не видят незафиксированные данные теста.
+    with override_settings(TASKS_EAGER=True):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # Откат транзакции между тестами не вызывает сигналов сброса кэшей.
+    for cache in caches.all():
+        cache.clear()
+    yield
+
+
+def reload_urlconf():
+    importlib.reload(importlib.import_module("blog.urls"))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+@contextmanager
+def read_views(async_views):
+    """Отдаёт страницы для чтения через blog.async_views или blog.views."""
+    try:
+        with override_settings(ASYNC_VIEWS=async_views):
+            reload_urlconf()
+            yield
+    finally:
+        reload_urlconf()
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
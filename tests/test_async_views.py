@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.test import AsyncClient, Client, override_settings
+from django.urls import resolve, reverse
+
+from conftest import read_views
+
+# Страницы читаются в потоках пула со своими соединениями: им нужны
+# записанные в базу данные, а не транзакция теста.
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+def read_urls(post):
+    return [
+        reverse("blog:index"),
+        reverse("blog:category_posts", args=[post.category.slug]),
+        reverse("blog:post_detail", args=[post.id]),
+        reverse("blog:profile", args=[post.author.username]),
+    ]
+
+
+def test_switch_routes_read_pages_to_async_views(
+        post_with_published_location):
+    urls = read_urls(post_with_published_location)
+    with read_views(True):
+        assert all(
+            asyncio.iscoroutinefunction(resolve(url).func) for url in urls)
+        assert not asyncio.iscoroutinefunction(
+            resolve(reverse("blog:create_post")).func)
+    assert not any(
+        asyncio.iscoroutinefunction(resolve(url).func) for url in urls)
+
+
+def test_async_views_over_asgi_match_sync_views(
+        post_with_published_location, comment_to_a_post):
+    sync_pages = []
+    for url in read_urls(post_with_published_location):
+        caches["default"].clear()
+        response = Client().get(url)
+        assert response.status_code == 200, url
+        sync_pages.append(response.content)
+    async_pages = []
+    with read_views(True):
+        client = AsyncClient()
+        for url in read_urls(post_with_published_location):
+            caches["default"].clear()
+            response = async_to_sync(client.get)(url)
+            assert response.status_code == 200, url
+            assert response["ETag"]
+            async_pages.append(response.content)
+    assert async_pages == sync_pages
+
+
+def test_async_view_answers_conditional_get(post_with_published_location):
+    url = reverse("blog:post_detail", args=[post_with_published_location.id])
+    with read_views(True):
+        client = AsyncClient()
+        etag = async_to_sync(client.get)(url)["ETag"]
+        # AsyncClient в Django 3.2 принимает заголовки под их именами.
+        response = async_to_sync(client.get)(url, **{"if-none-match": etag})
+    assert response.status_code == 304
+
+
+def test_query_budget_counts_async_view_queries(post_with_published_location):
+    url = reverse("blog:post_detail", args=[post_with_published_location.id])
+    with override_settings(QUERY_BUDGET_SERVER_TIMING=True):
+        expected = Client().get(url)["Server-Timing"].split(";")[-1]
+        caches["default"].clear()
+        with read_views(True):
+            response = async_to_sync(AsyncClient().get)(url)
+    assert response["Server-Timing"].split(";")[-1] == expected
+    assert expected != 'desc="0 queries"'
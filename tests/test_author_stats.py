@@ -0,0 +1,104 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+
+from blog.models import AuthorStats
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _stats(user):
+    return AuthorStats.objects.get(user=user)
+
+
+def test_stats_follow_posts_and_comments(
+    mixer, user, another_user, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(2).blend(
+        "blog.Comment", post=post, author=another_user)
+    stats = _stats(user)
+    assert (stats.post_count, stats.comment_count) == (1, 0)
+    assert stats.last_activity == post.created_at
+    stats = _stats(another_user)
+    assert (stats.post_count, stats.comment_count) == (0, 2)
+    assert stats.last_activity == comments[1].created_at
+
+    comments[1].delete()
+    stats = _stats(another_user)
+    assert stats.comment_count == 1
+    assert stats.last_activity == comments[0].created_at
+
+
+def test_post_delete_recounts_commenters(
+    mixer, user, another_user, post_with_published_location
+):
+    mixer.cycle(3).blend(
+        "blog.Comment", post=post_with_published_location,
+        author=another_user)
+    post_with_published_location.delete()
+    assert _stats(user).post_count == 0
+    stats = _stats(another_user)
+    assert stats.comment_count == 0
+    assert stats.last_activity is None
+
+
+def test_profile_shows_stats(
+    user_client, user, django_assert_num_queries,
+    post_with_published_location
+):
+    url = reverse("blog:profile", kwargs={"username": user.username})
+    user_client.get(url)
+    # Сессия, пользователь, автор вместе со статистикой и его посты.
+    with django_assert_num_queries(4):
+        response = user_client.get(url)
+    assert "Публикаций: 1" in response.content.decode()
+
+
+def test_stats_are_shown_to_owner_only(
+    mixer, user, user_client, another_user_client,
+    post_with_published_location
+):
+    mixer.blend("blog.Post", author=user, is_published=False)
+    url = reverse("blog:profile", kwargs={"username": user.username})
+    content = user_client.get(url).content.decode()
+    assert "Публикаций: 2" in content
+    assert "Последняя активность:" in content
+    content = another_user_client.get(url).content.decode()
+    for row in ("Публикаций:", "Комментариев:", "Последняя активность:"):
+        assert row not in content
+
+
+def test_commenter_profile_is_purged(
+    another_user_client, another_user, post_with_published_location
+):
+    url = reverse("blog:profile", kwargs={"username": another_user.username})
+    response = another_user_client.get(url)
+    assert "Комментариев: 0" in response.content.decode()
+    another_user_client.post(
+        reverse("blog:add_comment",
+                kwargs={"post_id": post_with_published_location.id}),
+        {"text": "Комментарий"})
+    response = another_user_client.get(
+        url, HTTP_IF_NONE_MATCH=response["ETag"])
+    assert "Комментариев: 1" in response.content.decode()
+
+
+def test_recount_command_repairs_drift(mixer, user, another_user):
+    mixer.cycle(2).blend("blog.Post", author=user)
+    AuthorStats.objects.filter(user=user).update(post_count=9)
+    AuthorStats.objects.filter(user=another_user).delete()
+
+    with pytest.raises(
+            CommandError,
+            match="Авторов с неверной статистикой: 2") as error:
+        call_command("recount_author_stats", "--check", stdout=StringIO())
+    assert error.value.returncode == 1
+    assert _stats(user).post_count == 9
+
+    call_command("recount_author_stats", stdout=StringIO())
+    assert _stats(user).post_count == 2
+    assert _stats(another_user).post_count == 0
+    call_command("recount_author_stats", "--check", stdout=StringIO())
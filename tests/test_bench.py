@@ -0,0 +1,72 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.bench import percentile, summarize
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_summarize_reports_percentiles_in_ms():
+    result = summarize([i / 1000 for i in range(1, 101)])
+    assert result["count"] == 100
+    assert (result["p50_ms"], result["p95_ms"], result["p99_ms"]) == (
+        50, 95, 99)
+    assert percentile([], 0.5) is None
+    # Ближайший ранг: ceil(0.5 * 5) = 3-й элемент, а не round(2.5) = 2-й.
+    assert percentile([1, 2, 3, 4, 5], 0.5) == 3
+    assert percentile(list(range(1, 51)), 0.95) == 48
+
+
+def test_seed_and_bench_cover_every_route(tmp_path):
+    call_command(
+        "seed_bench_data", users=5, posts=30, comments=100, batch_size=7,
+        stdout=StringIO())
+    assert Post.objects.count() == 30
+    assert Comment.objects.count() == 100
+    assert sum(Post.objects.values_list("comment_count", flat=True)) == 100
+
+    output = tmp_path / "report.json"
+    call_command(
+        "bench_routes", requests=2, warmup=1, memory_requests=1,
+        output=str(output), stdout=StringIO())
+    report = json.loads(output.read_text(encoding="utf-8"))
+    results = report["results"]
+    assert {"index", "post_detail", "category_posts", "profile",
+            "create_post", "edit_post", "delete_post", "edit_profile",
+            "add_comment", "edit_comment", "delete_comment", "about",
+            "rules"} <= set(results)
+    for name, result in results.items():
+        assert result["status"] in (200, 302), name
+        assert result["p99_ms"] >= result["p50_ms"]
+        assert result["peak_memory_kb"] > 0
+    assert Comment.objects.count() == 100, (
+        "замер POST-маршрутов должен откатываться")
+
+
+def test_bench_templates(tmp_path):
+    output = tmp_path / "templates.json"
+    call_command(
+        "bench_templates", renders=3, warmup=1, output=str(output),
+        stdout=StringIO())
+    results = json.loads(output.read_text(encoding="utf-8"))["results"]
+    assert set(results) == {"uncached", "cached", "production", "jinja2"}
+    assert all(result["count"] == 3 for result in results.values())
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bench_asgi(tmp_path):
+    call_command(
+        "seed_bench_data", users=2, posts=6, comments=6, stdout=StringIO())
+    output = tmp_path / "asgi.json"
+    call_command(
+        "bench_asgi", concurrency=2, requests=2, warmup=0, login=True,
+        output=str(output), stdout=StringIO())
+    results = json.loads(output.read_text(encoding="utf-8"))["results"]
+    assert set(results) == {"wsgi", "asgi", "asgi_async"}
+    for name, result in results.items():
+        assert result["errors"] == 0, name
+        assert result["count"] == 4, name
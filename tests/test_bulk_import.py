@@ -0,0 +1,85 @@
+import json
+from io import StringIO
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+
+from blog.importer import iter_fixture
+from blog.models import Category, Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+User = get_user_model()
+
+
+@pytest.fixture
+def fixture_path(tmp_path):
+    # Пользователи идут после постов, как в db.json.
+    objects = [
+        {"model": "blog.category", "pk": 7, "fields": {
+            "title": "Тема", "description": "О теме", "slug": "topic",
+            "is_published": True, "created_at": "2022-12-18T23:03:52Z"}},
+        {"model": "blog.location", "pk": 3, "fields": {
+            "name": "Остров", "is_published": True,
+            "created_at": "2022-12-18T23:03:52Z"}},
+        {"model": "blog.post", "pk": 11, "fields": {
+            "title": "Пост", "text": "Текст", "is_published": True,
+            "pub_date": "2022-12-19T10:00:00Z",
+            "created_at": "2022-12-18T23:06:18.993Z",
+            "author": 5, "category": 7, "location": 3}},
+        {"model": "admin.logentry", "pk": 1, "fields": {}},
+        {"model": "auth.user", "pk": 5, "fields": {
+            "username": "importer", "password": "!", "groups": [],
+            "user_permissions": [], "date_joined": "2022-12-18T23:00:00Z"}},
+        {"model": "blog.comment", "pk": 21, "fields": {
+            "text": "Первый", "post": 11, "author": 5,
+            "created_at": "2022-12-20T10:00:00Z"}},
+        {"model": "blog.comment", "pk": 22, "fields": {
+            "text": "Второй", "post": 11, "author": 5,
+            "created_at": "2022-12-20T11:00:00Z"}},
+    ]
+    path = tmp_path / "dump.json"
+    path.write_text(json.dumps(objects, ensure_ascii=False, indent=2),
+                    encoding="utf-8")
+    return path
+
+
+def test_iter_fixture_streams_in_small_reads(fixture_path):
+    expected = json.loads(fixture_path.read_text(encoding="utf-8"))
+    assert list(iter_fixture(fixture_path, read_size=7)) == expected
+
+
+def test_import_resolves_keys_and_is_idempotent(fixture_path, mixer):
+    # pk 5 уже занят другим пользователем.
+    mixer.blend(User, pk=5, username="someone-else")
+    for _ in range(2):
+        call_command(
+            "bulk_import", str(fixture_path), batch_size=1,
+            stdout=StringIO())
+
+    assert Post.objects.count() == 1
+    assert Comment.objects.count() == 2
+    post = Post.objects.select_related("author", "category").get()
+    assert post.author.username == "importer"
+    assert post.category == Category.objects.get(slug="topic")
+    assert post.created_at.isoformat() == "2022-12-18T23:06:18.993000+00:00"
+    assert post.comment_count == 2
+    assert User.objects.get(pk=5).username == "someone-else"
+
+
+def test_second_import_reports_skipped_rows(fixture_path):
+    call_command("bulk_import", str(fixture_path), stdout=StringIO())
+    out = StringIO()
+    call_command("bulk_import", str(fixture_path), stdout=out)
+    assert "blog.post: 1 строк" in out.getvalue()
+    assert "blog.comment: 2 строк" in out.getvalue()
+    assert "уже были в базе: 2" in out.getvalue()
+
+
+def test_import_refuses_taken_primary_keys(fixture_path, mixer):
+    mixer.blend("blog.Post", pk=11, title="Чужой пост")
+    with pytest.raises(CommandError, match="blog.post pk=11"):
+        call_command("bulk_import", str(fixture_path), stdout=StringIO())
+    assert not User.objects.filter(username="importer").exists()
+    assert not Comment.objects.exists()
@@ -0,0 +1,62 @@
+import re
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.constants import COMMENTS_PAGE_SIZE
+from blog.models import Comment
+
+pytestmark = [pytest.mark.django_db]
+
+MORE_RE = re.compile(r'href="([^"]+)" data-comments-more')
+
+
+@pytest.fixture
+def comments(mixer, post_with_published_location):
+    # Общее время создания: порядок решает id.
+    created_at = timezone.now()
+    mixer.cycle(2 * COMMENTS_PAGE_SIZE + 5).blend(
+        "blog.Comment", post=post_with_published_location)
+    Comment.objects.update(created_at=created_at)
+    return list(post_with_published_location.comments.order_by(
+        "created_at", "id").values_list("id", flat=True))
+
+
+def shown(content):
+    return [int(pk) for pk in re.findall(r'name="comment_(\d+)"', content)]
+
+
+def test_detail_renders_first_chunk(client, post_with_published_location,
+                                    comments):
+    response = client.get(reverse(
+        "blog:post_detail", kwargs={"id": post_with_published_location.id}))
+    content = response.content.decode()
+    assert shown(content) == comments[:COMMENTS_PAGE_SIZE]
+    assert MORE_RE.search(content)
+
+
+def test_chunks_continue_in_order(client, post_with_published_location,
+                                  comments):
+    content = client.get(reverse(
+        "blog:post_detail",
+        kwargs={"id": post_with_published_location.id})).content.decode()
+    loaded = shown(content)
+    while (more := MORE_RE.search(content)):
+        response = client.get(more.group(1).replace("&amp;", "&"))
+        assert response.status_code == 200
+        content = response.content.decode()
+        assert "<html" not in content, "Порция должна быть фрагментом"
+        loaded += shown(content)
+    assert loaded == comments
+
+
+def test_chunks_reject_bad_cursor_and_hidden_post(
+    client, post_with_published_location, comments
+):
+    url = reverse("blog:comments",
+                  kwargs={"id": post_with_published_location.id})
+    assert client.get(url, {"cursor": "испорчен"}).status_code == 404
+    post_with_published_location.is_published = False
+    post_with_published_location.save()
+    assert client.get(url).status_code == 404
@@ -0,0 +1,86 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models.signals import pre_delete
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Post, deleting_posts
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _count(post):
+    post.refresh_from_db(fields=["comment_count"])
+    return post.comment_count
+
+
+def test_add_and_delete_comment_keep_counter(
+    user_client, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.post(f"/posts/{post.id}/comment/", {"text": "Первый"})
+    user_client.post(f"/posts/{post.id}/comment/", {"text": "Второй"})
+    assert _count(post) == 2
+    comment = post.comments.first()
+    user_client.post(f"/posts/{post.id}/delete_comment/{comment.id}/")
+    assert _count(post) == 1
+
+
+def test_cascade_delete_keeps_counter(
+    mixer, another_user, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post, author=another_user)
+    mixer.blend("blog.Comment", post=post)
+    assert _count(post) == 4
+    another_user.delete()
+    assert _count(post) == 1
+
+
+def test_recount_command_repairs_drift(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    type(post).objects.filter(pk=post.pk).update(comment_count=7)
+
+    with pytest.raises(
+            CommandError, match="Постов с неверным счётчиком: 1") as error:
+        call_command("recount_comments", "--check", stdout=StringIO())
+    assert error.value.returncode == 1
+    assert _count(post) == 7
+
+    call_command("recount_comments", stdout=StringIO())
+    assert _count(post) == 2
+
+
+def test_feed_query_has_no_comment_join(client, post_with_published_location):
+    with CaptureQueriesContext(connection) as ctx:
+        client.get("/")
+    feed_sql = [
+        q["sql"] for q in ctx.captured_queries if '"blog_post"' in q["sql"]
+    ]
+    assert feed_sql
+    for sql in feed_sql:
+        assert "blog_comment" not in sql
+        assert "GROUP BY" not in sql
+
+
+def test_failed_post_delete_leaves_no_marks(
+    mixer, post_with_published_location
+):
+    post = post_with_published_location
+    comments = mixer.cycle(2).blend("blog.Comment", post=post)
+
+    def fail(**kwargs):
+        raise RuntimeError("сбой при удалении")
+
+    pre_delete.connect(fail, sender=Post)
+    try:
+        with pytest.raises(RuntimeError), transaction.atomic():
+            post.delete()
+    finally:
+        pre_delete.disconnect(fail, sender=Post)
+    assert deleting_posts() is None
+    comments[0].delete()
+    assert _count(post) == 1
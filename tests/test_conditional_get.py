@@ -0,0 +1,104 @@
+import pytest
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from blog import conditional, page_cache
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def conditional_stats():
+    conditional.stats.clear()
+    with override_settings(CONDITIONAL_GET_STATS=True):
+        yield conditional.stats
+    conditional.stats.clear()
+
+
+@pytest.fixture
+def pages(user, post_with_published_location):
+    post = post_with_published_location
+    return {
+        "blog:index": "/",
+        "blog:category_posts": f"/category/{post.category.slug}/",
+        "blog:post_detail": f"/posts/{post.id}/",
+        "blog:profile": f"/profile/{post.author.username}/",
+    }
+
+
+def test_revalidation_skips_rendering(
+    client, conditional_stats, pages, django_assert_num_queries
+):
+    for route, url in pages.items():
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response["Last-Modified"]
+        etag = response["ETag"]
+        assert etag.startswith('W/"')
+        with django_assert_num_queries(0):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, route
+        assert not response.templates, "304 не должен рендерить шаблон"
+        assert conditional_stats[(route, conditional.NOT_MODIFIED)] == 1
+    assert set(conditional.not_modified_rates().values()) == {0.5}
+
+
+def test_if_modified_since(client, pages):
+    response = client.get(pages["blog:index"])
+    response = client.get(
+        pages["blog:index"],
+        HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+    assert response.status_code == 304
+
+
+def test_changes_produce_new_validators(
+    user_client, client, pages, post_with_published_location
+):
+    url = pages["blog:post_detail"]
+    etag = client.get(url)["ETag"]
+    user_client.post(
+        f"/posts/{post_with_published_location.id}/comment/",
+        {"text": "Новый комментарий"})
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+    assert "Новый комментарий" in response.content.decode()
+
+
+def test_validators_depend_on_reader(user_client, client, pages):
+    url = pages["blog:profile"]
+    etag = client.get(url)["ETag"]
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Страница автора для него самого отличается от страницы для гостя")
+
+
+def test_login_again_invalidates_forms(user, pages):
+    user.set_password("password")
+    user.save()
+    client = Client()
+    credentials = {"username": user.username, "password": "password"}
+    client.post(reverse("login"), credentials)
+    url = pages["blog:post_detail"]
+    etag = client.get(url)["ETag"]
+    client.get(reverse("logout"))
+    client.post(reverse("login"), credentials)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "После нового входа в формах страницы другой csrf-токен")
+    assert response["ETag"] != etag
+
+
+def test_local_cache_validators_expire(client, pages):
+    # Поколения в кэше одного процесса истекают, и ETag, выданный до
+    # сброса в другом процессе, перестаёт совпадать.
+    with override_settings(PAGE_CACHE_LOCAL_TIMEOUT=0):
+        page_cache.get_cache().clear()
+        etag = client.get(pages["blog:index"])["ETag"]
+        response = client.get(pages["blog:index"], HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def test_newest_timestamps_default_to_none():
+    assert conditional.ConditionalGetMixin().get_newest_timestamps() == []
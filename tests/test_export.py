@@ -0,0 +1,75 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def staff_client(mixer):
+    client = Client()
+    client.force_login(mixer.blend("auth.User", is_staff=True))
+    return client
+
+
+@pytest.fixture
+def exported(mixer, user, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend("blog.Comment", post=post, author=user)
+    return post, comments
+
+
+def read_ndjson(response):
+    assert response.streaming, "Выгрузка должна отдаваться потоком"
+    body = b"".join(response.streaming_content).decode()
+    return [json.loads(line) for line in body.splitlines()]
+
+
+def test_staff_exports_posts(staff_client, exported, user):
+    post, _ = exported
+    response = staff_client.get(reverse("blog:export", args=["posts"]))
+    assert response["Content-Type"].startswith("application/x-ndjson")
+    [row] = read_ndjson(response)
+    assert row["id"] == post.id
+    assert row["author_username"] == user.username
+    assert row["category_slug"] == post.category.slug
+    assert row["location_name"] == post.location.name
+    assert row["comment_count"] == 3
+
+
+def test_comments_export_since_watermark(staff_client, exported):
+    _, comments = exported
+    url = reverse("blog:export", args=["comments"])
+    rows = read_ndjson(staff_client.get(url))
+    assert [row["id"] for row in rows] == [c.id for c in comments]
+
+    rows = read_ndjson(staff_client.get(url, {"since_id": comments[0].id}))
+    assert [row["id"] for row in rows] == [c.id for c in comments[1:]]
+
+    since = comments[-1].created_at.isoformat()
+    assert read_ndjson(staff_client.get(url, {"since": since})) == []
+    assert staff_client.get(url, {"since": "вчера"}).status_code == 400
+
+
+def test_export_is_staff_only(user_client, client):
+    url = reverse("blog:export", args=["posts"])
+    assert user_client.get(url).status_code == 403
+    assert client.get(url).status_code == 302
+
+
+def test_export_command(exported, tmp_path):
+    post, comments = exported
+    stdout = StringIO()
+    call_command("export_ndjson", "posts", stdout=stdout)
+    assert json.loads(stdout.getvalue())["id"] == post.id
+
+    output = tmp_path / "comments.ndjson"
+    call_command(
+        "export_ndjson", "comments", since_id=comments[1].id,
+        output=str(output), stderr=StringIO())
+    lines = output.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [comments[2].id]
@@ -0,0 +1,64 @@
+from io import BytesIO, StringIO
+
+import pytest
+from PIL import Image
+from django.core.files.images import ImageFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+
+from blog.images import generate_variants, variant_name
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture
+def photo_post(mixer, user, published_category, published_location):
+    buffer = BytesIO()
+    Image.new("RGB", (1200, 800), color=(10, 120, 200)).save(
+        buffer, format="JPEG")
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        is_published=True,
+        category=published_category,
+        location=published_location,
+        image=ImageFile(buffer, name="photo.jpg"),
+    )
+
+
+def test_variants_are_generated(photo_post):
+    assert photo_post.image_meta == {}
+    generate_variants(photo_post)
+    photo_post.refresh_from_db()
+    assert photo_post.image_meta == {
+        "width": 1200, "height": 800, "widths": [320, 640, 960]
+    }
+    for width in (320, 640, 960):
+        name = variant_name(photo_post.image.name, width)
+        with default_storage.open(name) as variant:
+            assert Image.open(variant).size == (width, round(800 * width / 1200))
+
+
+def test_templates_emit_srcset_and_dimensions(user_client, photo_post):
+    pages = ("/", f"/posts/{photo_post.id}/")
+    for url in pages:
+        content = user_client.get(url).content.decode()
+        assert "srcset=" not in content
+    generate_variants(photo_post)
+    for url in pages:
+        content = user_client.get(url).content.decode()
+        assert 'width="1200" height="800"' in content
+        assert "_w320.jpg 320w" in content
+        assert "_w960.jpg 960w" in content
+        assert "photo" in content and "1200w" in content
+
+
+def test_backfill_command(photo_post):
+    call_command("generate_image_variants", stdout=StringIO())
+    photo_post.refresh_from_db()
+    assert photo_post.image_meta["widths"] == [320, 640, 960]
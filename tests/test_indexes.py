@@ -0,0 +1,46 @@
+import pytest
+from django.db import connection
+
+from blog.models import Category, Post
+from blog.paginators import CursorPaginator
+from blog.utils import get_query_all_posts, get_query_published_posts
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != "sqlite", reason="EXPLAIN QUERY PLAN is SQLite"
+    ),
+]
+
+
+def _plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return " | ".join(row[-1] for row in cursor.fetchall())
+
+
+def _first_page(queryset):
+    return queryset.order_by(*CursorPaginator.ordering)[:11]
+
+
+def test_feed_uses_published_index(posts_with_unpublished_category):
+    plan = _plan(_first_page(get_query_published_posts(Post.objects)))
+    assert "post_published_feed_idx" in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
+
+
+def test_category_feed_uses_category_index(published_category):
+    plan = _plan(_first_page(get_query_published_posts(
+        Category.objects.get(pk=published_category.pk).posts
+    )))
+    assert "post_category_feed_idx" in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
+
+
+def test_profile_uses_author_index(user):
+    plan = _plan(_first_page(
+        get_query_all_posts(Post.objects).filter(author=user)
+    ))
+    assert "post_author_feed_idx" in plan, plan
+    assert "TEMP B-TREE" not in plan, plan
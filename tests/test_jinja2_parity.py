@@ -0,0 +1,84 @@
+import re
+
+import pytest
+from django.core.cache import caches
+from django.test import override_settings
+from django.urls import reverse
+
+from blog import page_cache
+
+pytestmark = [pytest.mark.django_db]
+
+CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="[^"]*"')
+
+# Кавычки, апостроф, теги и переводы строк: экранирование и linebreaksbr
+# у Jinja2 должны совпасть с DTL.
+TRICKY_TEXT = (
+    "Он сказал: \"<b>Привет</b>\" & ушёл.\nO'Brien\n\n" + "слово " * 20)
+
+
+@pytest.fixture
+def blog_content(mixer, user, another_user, post_with_published_location,
+                 many_posts_with_published_locations,
+                 posts_with_unpublished_category):
+    user.first_name, user.last_name = "Имя", "Фамилия"
+    user.save()
+    post = post_with_published_location
+    post.title = "Пост <с \"кавычками\"> & 'апострофом'"
+    post.text = TRICKY_TEXT
+    post.save()
+    mixer.blend(
+        "blog.Post", author=user, category=post.category, location=None,
+        text=TRICKY_TEXT)
+    mixer.cycle(3).blend(
+        "blog.Comment", post=post, author=mixer.sequence(user, another_user),
+        text=TRICKY_TEXT)
+    return post
+
+
+def page_urls(post):
+    return [
+        reverse("blog:index"),
+        reverse("blog:index") + "?page=2",
+        reverse("blog:category_posts", args=[post.category.slug]),
+        reverse("blog:profile", args=[post.author.username]),
+        reverse("blog:post_detail", args=[post.id]),
+        reverse("blog:comments", args=[post.id]),
+    ]
+
+
+def render_with(engine, client, url):
+    # Между движками не должно остаться ни страниц, ни карточек в кэше.
+    for cache in caches.all():
+        cache.clear()
+    with override_settings(BLOG_TEMPLATE_ENGINE=engine):
+        response = client.get(url)
+    assert response.status_code == 200, url
+    assert response.using == engine
+    return CSRF_RE.sub('name="csrfmiddlewaretoken" value=""',
+                       response.content.decode())
+
+
+@pytest.mark.parametrize("client_name", [
+    "unlogged_client", "user_client", "another_user_client"])
+def test_jinja2_output_matches_dtl(request, blog_content, client_name):
+    client = request.getfixturevalue(client_name)
+    for url in page_urls(blog_content):
+        django_html = render_with("django", client, url)
+        jinja2_html = render_with("jinja2", client, url)
+        assert jinja2_html == django_html, url
+
+
+def test_card_fragments_are_shared(unlogged_client, blog_content):
+    url = reverse("blog:index")
+    django_html = render_with("django", unlogged_client, url)
+    cards = caches["post_cards"]
+    cached_cards = len(cards._cache)
+    assert cached_cards
+    page_cache.get_cache().clear()
+    with override_settings(BLOG_TEMPLATE_ENGINE="jinja2"):
+        response = unlogged_client.get(url)
+    # Карточки, закэшированные DTL, Jinja2 берёт из того же кэша.
+    assert len(cards._cache) == cached_cards
+    assert CSRF_RE.sub('name="csrfmiddlewaretoken" value=""',
+                       response.content.decode()) == django_html
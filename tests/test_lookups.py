@@ -0,0 +1,78 @@
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from blog import lookups
+from blog.models import Post
+from blog.utils import get_query_published_posts
+
+pytestmark = [pytest.mark.django_db]
+
+
+def category_queries(queries):
+    return [
+        query["sql"] for query in queries.captured_queries
+        if "blog_category" in query["sql"]
+        or "blog_location" in query["sql"]
+    ]
+
+
+def test_category_page_without_category_queries(
+    user_client, django_assert_max_num_queries, post_with_published_location
+):
+    url = reverse("blog:category_posts", kwargs={
+        "category_slug": post_with_published_location.category.slug})
+    user_client.get(url)
+    with django_assert_max_num_queries(3) as queries:
+        response = user_client.get(url)
+    assert response.status_code == 200
+    assert not category_queries(queries), (
+        "Категория и места должны браться из справочников процесса")
+    assert post_with_published_location.location.name in (
+        response.content.decode())
+
+
+def test_posts_share_cached_objects(post_with_published_location):
+    post = get_query_published_posts(Post.objects).get()
+    tables = lookups.get_tables()
+    assert post.category is tables.categories[post.category_id]
+    assert post.location is tables.locations[post.location_id]
+
+
+def test_save_and_delete_refresh_tables(
+    client, post_with_published_location
+):
+    category = post_with_published_location.category
+    url = reverse("blog:category_posts", kwargs={
+        "category_slug": category.slug})
+    assert client.get(url).status_code == 200
+
+    category.is_published = False
+    category.save()
+    assert client.get(url).status_code == 404
+    assert not get_query_published_posts(Post.objects).exists()
+
+    category.delete()
+    assert category.pk not in lookups.get_tables().categories
+
+
+def test_lost_version_reloads_tables(published_category):
+    lookups.get_tables()
+    cache.clear()
+    type(published_category).objects.filter(
+        pk=published_category.pk).update(title="Изменено в обход сигналов")
+    tables = lookups.get_tables()
+    assert tables.categories[published_category.pk].title == (
+        "Изменено в обход сигналов")
+
+
+def test_local_cache_version_expires(published_category):
+    # Правку в другом процессе этот процесс видит по истечении версии.
+    with override_settings(LOOKUP_LOCAL_TIMEOUT=0):
+        cache.clear()
+        lookups.get_tables()
+        type(published_category).objects.filter(
+            pk=published_category.pk).update(is_published=False)
+        tables = lookups.get_tables()
+    assert not tables.categories[published_category.pk].is_published
@@ -0,0 +1,120 @@
+"""Объект загружается один раз за запрос: точное число запросов к БД.
+
+Первые два запроса у залогиненного пользователя — сессия и пользователь.
+"""
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import lookups
+from blog.models import Comment, Post
+from blog.utils import get_publication_boundary
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def objects(mixer, user, post_with_published_location):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    mixer.cycle(5).blend("blog.Comment", post=post)
+    lookups.get_tables()
+    get_publication_boundary()
+    return post, comment
+
+
+@pytest.mark.parametrize(
+    "route, kwargs, expected",
+    [
+        # Даты для ETag; пост с автором, категория и место из справочников;
+        # комментарии с авторами.
+        ("blog:post_detail", "post", 5),
+        # Пост; категории и места для выпадающих списков формы.
+        ("blog:edit_post", "post", 5),
+        ("blog:delete_post", "post", 4),
+        # Только комментарий, его пост и автор подтянуты соединением.
+        ("blog:edit_comment", "comment", 3),
+        ("blog:delete_comment", "comment", 3),
+    ],
+)
+def test_get_fetches_object_once(
+    user_client, django_assert_num_queries, objects, route, kwargs, expected
+):
+    post, comment = objects
+    url_kwargs = (
+        {"id": post.id} if kwargs == "post"
+        else {"post_id": post.id, "comment_id": comment.id}
+    )
+    with django_assert_num_queries(expected):
+        response = user_client.get(reverse(route, kwargs=url_kwargs))
+    assert response.status_code == 200
+
+
+def test_edit_post_submit(user_client, django_assert_num_queries, objects):
+    post, _ = objects
+    data = {
+        "title": "Новый заголовок",
+        "text": "Новый текст",
+        "pub_date": timezone.now().strftime("%Y-%m-%d"),
+        "category": post.category_id,
+        "location": post.location_id,
+    }
+    # Пост с автором; категория и место для полей формы и их проверка
+    # моделью; UPDATE.
+    with django_assert_num_queries(8):
+        response = user_client.post(
+            reverse("blog:edit_post", kwargs={"id": post.id}), data)
+    assert response.status_code == 302
+    post.refresh_from_db()
+    assert post.title == "Новый заголовок"
+
+
+def test_delete_post_skips_per_comment_signals(
+    user_client, django_assert_num_queries, objects
+):
+    post, _ = objects
+    # Пост с автором, выборка комментариев для каскада, два DELETE
+    # и пересчёт статистики авторов.
+    with django_assert_num_queries(7):
+        user_client.post(reverse("blog:delete_post", kwargs={"id": post.id}))
+    assert not Post.objects.filter(pk=post.pk).exists()
+    assert not Comment.objects.filter(post_id=post.pk).exists()
+
+
+def test_comment_submit(user_client, django_assert_num_queries, objects):
+    post, comment = objects
+    url_kwargs = {"post_id": post.id, "comment_id": comment.id}
+    # Запись идёт в транзакции retry_on_locked: в тесте это SAVEPOINT
+    # и RELEASE, в работе — один BEGIN.
+    # Комментарий с постом и автором, UPDATE.
+    with django_assert_num_queries(4 + 2):
+        user_client.post(
+            reverse("blog:edit_comment", kwargs=url_kwargs), {"text": "Да"})
+    # Пост с автором, INSERT, обновление счётчика и статистики автора.
+    with django_assert_num_queries(6 + 2):
+        user_client.post(
+            reverse("blog:add_comment", kwargs={"post_id": post.id}),
+            {"text": "Ещё"})
+    # Комментарий с постом и автором, DELETE, обновление счётчика
+    # и статистики автора.
+    with django_assert_num_queries(6 + 2):
+        user_client.post(reverse("blog:delete_comment", kwargs=url_kwargs))
+    post.refresh_from_db()
+    assert post.comment_count == 6
+
+
+def test_foreign_object_is_not_loaded_twice(
+    another_user_client, django_assert_num_queries, objects
+):
+    post, comment = objects
+    # Чужой пост: один запрос за объектом и сразу перенаправление.
+    with django_assert_num_queries(3):
+        response = another_user_client.get(
+            reverse("blog:edit_post", kwargs={"id": post.id}))
+    assert response.status_code == 302
+    with django_assert_num_queries(3):
+        response = another_user_client.post(reverse(
+            "blog:delete_comment",
+            kwargs={"post_id": post.id, "comment_id": comment.id}))
+    assert response.status_code == 302
+    assert Comment.objects.filter(pk=comment.pk).exists()
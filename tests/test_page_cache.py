@@ -0,0 +1,138 @@
+import pytest
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test import override_settings
+
+from blog import page_cache
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def page_cache_stats():
+    """Включает подсчёт попаданий и промахов кэша страниц по маршрутам."""
+    page_cache.stats.clear()
+    with override_settings(PAGE_CACHE_STATS=True):
+        yield page_cache.stats
+    page_cache.stats.clear()
+
+
+@pytest.fixture
+def pages(user, post_with_published_location):
+    post = post_with_published_location
+    return {
+        "blog:index": "/",
+        "blog:category_posts": f"/category/{post.category.slug}/",
+        "blog:post_detail": f"/posts/{post.id}/",
+        "blog:profile": f"/profile/{post.author.username}/",
+    }
+
+
+def test_anonymous_pages_are_cached(
+    client, page_cache_stats, pages, django_assert_num_queries
+):
+    for url in pages.values():
+        first = client.get(url)
+        with django_assert_num_queries(0):
+            second = client.get(url)
+        assert second.content == first.content
+    for route in pages:
+        assert page_cache_stats[(route, "miss")] == 1
+        assert page_cache_stats[(route, "hit")] == 1
+
+
+def test_logged_in_users_bypass_cache(user_client, page_cache_stats, pages):
+    for url in pages.values():
+        user_client.get(url)
+        user_client.get(url)
+    assert not page_cache_stats
+
+
+def test_page_numbers_are_cached_separately(client, page_cache_stats):
+    client.get("/")
+    client.get("/?page=1")
+    assert page_cache_stats[("blog:index", "miss")] == 2
+
+
+def test_comment_purges_post_pages(
+    client, user_client, page_cache_stats, pages, post_with_published_location
+):
+    post = post_with_published_location
+    for url in pages.values():
+        client.get(url)
+    user_client.post(f"/posts/{post.id}/comment/", {"text": "Новый"})
+    page_cache_stats.clear()
+    for url in pages.values():
+        client.get(url)
+    for route in pages:
+        assert page_cache_stats[(route, "miss")] == 1, route
+    assert "Новый" in client.get(pages["blog:post_detail"]).content.decode()
+
+
+def test_category_change_purges_everything(
+    client, page_cache_stats, pages, post_with_published_location
+):
+    for url in pages.values():
+        client.get(url)
+    category = post_with_published_location.category
+    category.title = "Переименованная"
+    category.save()
+    page_cache_stats.clear()
+    for url in pages.values():
+        assert "Переименованная" in client.get(url).content.decode()
+    assert not any(
+        outcome == "hit" for _, outcome in page_cache_stats
+    )
+
+
+def test_only_shown_user_fields_purge_pages(
+    client, page_cache_stats, pages, mixer, post_with_published_location
+):
+    url = pages["blog:index"]
+    user = post_with_published_location.author
+    client.get(url)
+    mixer.blend(settings.AUTH_USER_MODEL)
+    user.email = "new@example.com"
+    user.save()
+    client.get(url)
+    assert page_cache_stats[("blog:index", "hit")] == 1
+    user.username = "renamed"
+    user.save()
+    assert "@renamed" in client.get(url).content.decode()
+    assert page_cache_stats[("blog:index", "miss")] == 2
+
+
+def test_unrelated_post_keeps_other_profiles_cached(
+    client, page_cache_stats, pages, another_user, mixer,
+    post_with_published_location
+):
+    post = post_with_published_location
+    client.get(pages["blog:profile"])
+    mixer.blend(
+        "blog.Post", author=another_user,
+        category=post.category, location=post.location,
+    )
+    client.get(pages["blog:profile"])
+    assert page_cache_stats[("blog:profile", "hit")] == 1
+
+
+def test_local_cache_caps_page_lifetime(client, page_cache_stats, pages):
+    # В кэше одного процесса страница живёт не дольше
+    # PAGE_CACHE_LOCAL_TIMEOUT: сбросы в других процессах сюда не доходят.
+    with override_settings(PAGE_CACHE_LOCAL_TIMEOUT=0):
+        client.get(pages["blog:index"])
+        client.get(pages["blog:index"])
+    assert page_cache_stats[("blog:index", "miss")] == 2
+    assert page_cache.cache_timeout(None) == (
+        settings.PAGE_CACHE_LOCAL_TIMEOUT)
+    assert page_cache.cache_timeout(10) == 10
+
+
+def test_view_must_declare_page_cache_groups():
+    view = page_cache.AnonymousPageCacheMixin()
+    view.kwargs = {}
+    with pytest.raises(ImproperlyConfigured):
+        view.get_page_cache_groups()
+    view.page_cache_groups = ("post:{id}",)
+    view.kwargs = {"id": 7}
+    assert view.get_page_cache_groups() == ["post:7"]
@@ -0,0 +1,90 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def feed_posts(mixer, user, published_category, published_location):
+    # Одинаковые pub_date у соседних постов проверяют разрешение по id.
+    now = timezone.now()
+    pub_dates = (
+        now - timedelta(days=i // 2) - timedelta(hours=1)
+        for i in range(N_PER_PAGE * 2 + 5)
+    )
+    return mixer.cycle(N_PER_PAGE * 2 + 5).blend(
+        "blog.Post",
+        author=user,
+        is_published=True,
+        pub_date=pub_dates,
+        category=published_category,
+        location=published_location,
+    )
+
+
+def _walk(client, url):
+    seen = []
+    response = client.get(url)
+    pages = [response]
+    while response.context["page_obj"].has_next():
+        cursor = response.context["page_obj"].next_cursor
+        response = client.get(f"{url}?cursor={cursor}")
+        pages.append(response)
+    for page in pages:
+        seen.extend(post.id for post in page.context["page_obj"])
+    return pages, seen
+
+
+@pytest.mark.parametrize("url_name", ["index", "category", "profile"])
+def test_cursor_walk_covers_feed_once(
+    client, feed_posts, published_category, user, url_name
+):
+    url = {
+        "index": "/",
+        "category": f"/category/{published_category.slug}/",
+        "profile": f"/profile/{user.username}/",
+    }[url_name]
+    pages, seen = _walk(client, url)
+    expected = sorted(
+        feed_posts, key=lambda post: (post.pub_date, post.id), reverse=True
+    )
+    assert seen == [post.id for post in expected], (
+        "Убедитесь, что курсорная пагинация обходит ленту без пропусков и"
+        " повторов в порядке «от новых к старым»."
+    )
+    assert len(pages) == 3
+
+
+def test_cursor_previous_returns_same_page(client, feed_posts):
+    first = client.get("/").context["page_obj"]
+    second = client.get(f"/?cursor={first.next_cursor}").context["page_obj"]
+    back = client.get(
+        f"/?cursor={second.previous_cursor}").context["page_obj"]
+    assert [post.id for post in back] == [post.id for post in first]
+    assert not back.has_previous()
+
+
+def test_cursor_page_runs_no_count(client, feed_posts):
+    first = client.get("/").context["page_obj"]
+    with CaptureQueriesContext(connection) as ctx:
+        client.get(f"/?cursor={first.next_cursor}")
+    assert not any("COUNT(*)" in q["sql"].upper() for q in ctx.captured_queries)
+    assert not any("OFFSET" in q["sql"].upper() for q in ctx.captured_queries)
+
+
+def test_page_number_links_still_work(client, feed_posts):
+    response = client.get("/?page=2")
+    assert response.status_code == 200
+    page = response.context["page_obj"]
+    assert page.number == 2
+    assert len(page) == N_PER_PAGE
+
+
+def test_invalid_cursor_is_404(client, feed_posts):
+    assert client.get("/?cursor=not-a-cursor").status_code == 404
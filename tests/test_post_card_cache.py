@@ -0,0 +1,80 @@
+import pytest
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.test import override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+LOCMEM = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "post_cards": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "post-cards-test",
+    },
+}
+
+
+def _file_based(tmp_path):
+    return {
+        "default": LOCMEM["default"],
+        "post_cards": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path / "post_cards"),
+        },
+    }
+
+
+@pytest.fixture(params=["locmem", "filebased"])
+def card_cache(request, tmp_path):
+    config = LOCMEM if request.param == "locmem" else _file_based(tmp_path)
+    with override_settings(CACHES=config):
+        caches["post_cards"].clear()
+        yield caches["post_cards"]
+        caches["post_cards"].clear()
+
+
+def _card_key(post):
+    post.refresh_from_db()
+    return make_template_fragment_key(
+        "post_card", [post.id, post.card_version])
+
+
+def test_feed_is_served_from_card_cache(
+    card_cache, user_client, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.get("/")
+    key = _card_key(post)
+    assert card_cache.get(key) is not None
+    card_cache.set(key, "<div>из кэша</div>")
+    assert "из кэша" in user_client.get("/").content.decode()
+
+
+@pytest.mark.parametrize("change", ["post", "category", "location",
+                                    "author", "comments"])
+def test_card_is_invalidated_by_related_changes(
+    card_cache, user_client, mixer, post_with_published_location, change
+):
+    post = post_with_published_location
+    user_client.get("/")
+    old_key = _card_key(post)
+    card_cache.set(old_key, "<div>устаревшая карточка</div>")
+
+    if change == "post":
+        post.title = "Новый заголовок"
+        post.save()
+    elif change == "category":
+        post.category.title = "Новая категория"
+        post.category.save()
+    elif change == "location":
+        post.location.name = "Новое место"
+        post.location.save()
+    elif change == "author":
+        post.author.username = "renamed_author"
+        post.author.save()
+    else:
+        mixer.blend("blog.Comment", post=post)
+
+    content = user_client.get("/").content.decode()
+    assert _card_key(post) != old_key
+    assert "устаревшая карточка" not in content
@@ -0,0 +1,126 @@
+import pytest
+from django.conf import settings
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from blog import lookups
+from blog.middleware import QueryBudgetExceeded
+from blog.urls import app_name, urlpatterns
+from blog.utils import get_publication_boundary
+
+pytestmark = [pytest.mark.django_db]
+
+BLOG_ROUTES = [f"{app_name}:{pattern.name}" for pattern in urlpatterns]
+PUBLIC_ROUTES = {
+    "blog:index", "blog:post_detail", "blog:comments",
+    "blog:category_posts", "blog:profile", "blog:search",
+}
+# Маршруты, которые отвечают на GET только редиректом.
+POST_DATA = {"blog:add_comment": {"text": "Комментарий"}}
+
+
+@pytest.fixture
+def query_budget():
+    """Превращает превышение бюджета запросов в исключение."""
+    with override_settings(QUERY_BUDGET_RAISE=True):
+        yield settings.QUERY_BUDGETS
+
+
+@pytest.fixture
+def route_kwargs(mixer, user, post_with_published_location,
+                 published_category):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    mixer.cycle(5).blend("blog.Comment", post=post)
+    # Бюджеты рассчитаны на уже загруженные справочники и границу
+    # публикаций.
+    lookups.get_tables()
+    get_publication_boundary()
+    return {
+        "blog:post_detail": {"id": post.id},
+        "blog:comments": {"id": post.id},
+        "blog:category_posts": {"category_slug": published_category.slug},
+        "blog:delete_post": {"id": post.id},
+        "blog:profile": {"username": user.username},
+        "blog:edit_post": {"id": post.id},
+        "blog:add_comment": {"post_id": post.id},
+        "blog:edit_comment": {"post_id": post.id, "comment_id": comment.id},
+        "blog:delete_comment": {
+            "post_id": post.id, "comment_id": comment.id
+        },
+        "blog:export": {"kind": "posts"},
+    }
+
+
+def test_every_blog_route_has_budget():
+    missing = set(BLOG_ROUTES) - set(settings.QUERY_BUDGETS)
+    assert not missing, f"Нет бюджета запросов для маршрутов: {missing}"
+
+
+def expected_status(route, client_name):
+    if route in PUBLIC_ROUTES:
+        return 200
+    if client_name == "unlogged_client":
+        return 302
+    if route == "blog:export":
+        return 403
+    return 200
+
+
+@pytest.mark.parametrize(
+    "route", [route for route in BLOG_ROUTES if route not in POST_DATA])
+@pytest.mark.parametrize("client_name", ["user_client", "unlogged_client"])
+def test_route_within_query_budget(
+    request, query_budget, route_kwargs, route, client_name
+):
+    client = request.getfixturevalue(client_name)
+    url = reverse(route, kwargs=route_kwargs.get(route))
+    with override_settings(DEBUG=False):
+        response = client.get(url)
+    # Иначе бюджет «проходит» ответ, до представления не дошедший.
+    assert response.status_code == expected_status(route, client_name)
+
+
+# В транзакции теста atomic() стоил бы SAVEPOINT и RELEASE вместо BEGIN.
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("route", list(POST_DATA))
+def test_write_route_within_query_budget(
+    query_budget, route_kwargs, user_client, route
+):
+    url = reverse(route, kwargs=route_kwargs.get(route))
+    with override_settings(DEBUG=False):
+        response = user_client.post(url, POST_DATA[route])
+    assert response.status_code == 302
+    assert response.url == reverse(
+        "blog:post_detail", args=[route_kwargs[route]["post_id"]])
+
+
+def test_budget_overrun_raises(query_budget, user_client):
+    with override_settings(QUERY_BUDGETS={"blog:index": 0}):
+        with pytest.raises(QueryBudgetExceeded):
+            user_client.get(reverse("blog:index"))
+
+
+def test_server_timing_header_is_opt_in(client):
+    with override_settings(QUERY_BUDGET_SERVER_TIMING=True):
+        response = client.get(reverse("blog:index"))
+    assert "queries" in response["Server-Timing"]
+    with override_settings(QUERY_BUDGET_SERVER_TIMING=False):
+        assert "Server-Timing" not in client.get(reverse("blog:index"))
+
+
+def test_unsampled_requests_are_not_counted(query_budget):
+    with override_settings(
+            QUERY_BUDGET_SAMPLE_RATE=0, QUERY_BUDGETS={"blog:index": 0}):
+        response = Client().get(reverse("blog:index"))
+    assert response.status_code == 200
+    assert not hasattr(response.wsgi_request, "query_stats")
+
+
+def test_disabled_middleware_skips_checks():
+    with override_settings(
+            QUERY_BUDGET_ENABLED=False, QUERY_BUDGET_RAISE=True,
+            QUERY_BUDGETS={"blog:index": 0}):
+        response = Client().get(reverse("blog:index"))
+    assert response.status_code == 200
+    assert not hasattr(response.wsgi_request, "query_stats")
@@ -0,0 +1,116 @@
+"""Чтение с реплики и закрепление за основной базой после записи.
+
+Реплику изображает отдельный файл SQLite со схемой, но без данных:
+всё, что тест пишет, попадает только в основную базу.
+"""
+import copy
+from unittest import mock
+
+import pytest
+from django.db import connections
+from django.test import override_settings
+from django.urls import reverse
+
+from blog.middleware import ReplicaStickinessMiddleware
+from blog.models import Post
+from blog.routers import ReplicaRouter, use_primary
+from blog.tasks import generate_image_variants
+
+REPLICA = "replica"
+
+pytestmark = [
+    pytest.mark.django_db(databases=["default", REPLICA]),
+]
+
+COOKIE = ReplicaStickinessMiddleware.cookie_name
+
+
+@pytest.fixture(scope="module", autouse=True)
+def replica_db(tmp_path_factory, django_db_setup, django_db_blocker):
+    """Алиас реплики только на время модуля, база — во временном каталоге."""
+    name = str(tmp_path_factory.mktemp("replica") / "replica.sqlite3")
+    connections.settings[REPLICA] = {
+        **copy.deepcopy(connections.settings["default"]),
+        "NAME": name,
+        "TEST": {"NAME": name},
+    }
+    try:
+        with django_db_blocker.unblock():
+            connections[REPLICA].creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False)
+        yield REPLICA
+    finally:
+        with django_db_blocker.unblock():
+            connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+
+@pytest.fixture(autouse=True)
+def replicas():
+    with override_settings(DATABASE_REPLICAS=[REPLICA]):
+        yield
+
+
+def replicate(post):
+    """Копирует пост и связанные с ним объекты на реплику."""
+    for obj in (post.author, post.category, post.location, post):
+        type(obj).objects.using(REPLICA).bulk_create([obj])
+
+
+def test_reads_go_to_replica_and_writes_to_primary(
+    post_with_published_location
+):
+    router = ReplicaRouter()
+    assert router.db_for_read(Post) == REPLICA
+    assert router.db_for_write(Post) == "default"
+    posts = Post.objects.filter(pk=post_with_published_location.pk)
+    assert not posts.exists()
+    with use_primary():
+        assert posts.exists()
+
+
+def test_author_sees_own_write_other_readers_use_replica(
+    user_client, another_user_client, post_with_published_location
+):
+    post = post_with_published_location
+    replicate(post)
+    detail = reverse("blog:post_detail", kwargs={"id": post.id})
+
+    response = user_client.post(
+        reverse("blog:add_comment", kwargs={"post_id": post.id}),
+        {"text": "Свежий комментарий"})
+    assert response.cookies[COOKIE]["max-age"] == 15
+
+    response = user_client.get(detail)
+    assert response.status_code == 200
+    assert "Свежий комментарий" in response.content.decode()
+    response = another_user_client.get(detail)
+    assert response.status_code == 200
+    assert "Свежий комментарий" not in response.content.decode(), (
+        "Без записи чтение должно идти с реплики, куда комментарий не дошёл")
+
+
+def test_no_pin_without_replicas(user_client, post_with_published_location):
+    with override_settings(DATABASE_REPLICAS=[]):
+        response = user_client.post(
+            reverse("blog:add_comment",
+                    kwargs={"post_id": post_with_published_location.id}),
+            {"text": "Комментарий"})
+    assert COOKIE not in response.cookies
+
+
+def test_login_does_not_pin_reader(client, user):
+    client.force_login(user)
+    response = client.get(reverse("blog:index"))
+    assert COOKIE not in response.cookies
+    response = client.post(reverse("logout"))
+    assert COOKIE not in response.cookies
+
+
+def test_image_task_reads_from_primary(post_with_published_location):
+    # Пост есть только в основной базе, как сразу после создания.
+    post = post_with_published_location
+    with mock.patch("blog.tasks.generate_variants") as generate:
+        generate_image_variants(post.pk)
+    assert generate.call_args.args[0] == post
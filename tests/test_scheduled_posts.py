@@ -0,0 +1,63 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from blog import utils
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def scheduled_post(mixer, user, published_category, published_location):
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        is_published=True,
+        pub_date=timezone.now() + timedelta(minutes=30),
+        category=published_category,
+        location=published_location,
+    )
+
+
+def _shift_clock(monkeypatch, delta):
+    moment = timezone.now() + delta
+    monkeypatch.setattr(utils.timezone, "now", lambda: moment)
+
+
+def test_scheduled_post_appears_without_restart(
+    monkeypatch, another_user_client, user, scheduled_post
+):
+    urls = ("/", f"/profile/{user.username}/")
+    for url in urls:
+        assert scheduled_post not in another_user_client.get(url).context["page_obj"]
+    _shift_clock(monkeypatch, timedelta(hours=1))
+    for url in urls:
+        assert scheduled_post in another_user_client.get(url).context["page_obj"]
+
+
+def test_publication_boundary(monkeypatch, mixer, user, scheduled_post):
+    cache.delete(utils.PUBLICATION_BOUNDARY_CACHE_KEY)
+    assert utils.get_publication_boundary() == scheduled_post.pub_date
+
+    sooner = mixer.blend(
+        "blog.Post", author=user, is_published=True,
+        pub_date=timezone.now() + timedelta(minutes=5),
+    )
+    assert utils.get_publication_boundary() == sooner.pub_date
+
+    _shift_clock(monkeypatch, timedelta(minutes=10))
+    assert utils.get_publication_boundary() == scheduled_post.pub_date
+
+    _shift_clock(monkeypatch, timedelta(hours=1))
+    assert utils.get_publication_boundary() is None
+
+
+def test_publication_timeout_stops_at_boundary():
+    now = timezone.now()
+    assert utils.publication_timeout(600, None, now) == 600
+    assert utils.publication_timeout(
+        600, now + timedelta(seconds=30), now) == 31
+    assert utils.publication_timeout(
+        600, now + timedelta(hours=2), now) == 600
@@ -0,0 +1,117 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import search
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def posts(mixer, user, published_category, published_location):
+    def blend(title, text, **kwargs):
+        fields = dict(
+            author=user, category=published_category,
+            location=published_location, is_published=True,
+            pub_date=timezone.now() - timedelta(days=1))
+        fields.update(kwargs)
+        return mixer.blend("blog.Post", title=title, text=text, **fields)
+
+    return {
+        "title": blend("Прогулка по лесу", "Шли долго."),
+        "text": blend("Обед", "После обеда прогулка <b>вдоль</b> реки."),
+        "hidden": blend("Прогулка тайная", "Снята.", is_published=False),
+        "future": blend(
+            "Прогулка завтра", "Позже.",
+            pub_date=timezone.now() + timedelta(days=1)),
+        "other": blend("Дождь", "Сидели дома."),
+    }
+
+
+def found(client, query, **params):
+    response = client.get(reverse("blog:search"), {"q": query, **params})
+    assert response.status_code == 200
+    return response, [post.id for post in response.context["page_obj"]]
+
+
+def test_search_ranks_published_matches(user_client, posts):
+    _, ids = found(user_client, "прогулк")
+    assert ids == [posts["title"].id, posts["text"].id], (
+        "Совпадение в заголовке должно быть выше совпадения в тексте, "
+        "а неопубликованные и отложенные посты не должны находиться")
+
+
+def test_search_highlights_and_escapes(user_client, posts):
+    response, _ = found(user_client, "прогулка")
+    content = response.content.decode()
+    assert "<mark>Прогулка</mark> по лесу" in content
+    assert "<mark>прогулка</mark> &lt;b&gt;вдоль&lt;/b&gt;" in content
+
+
+def test_index_follows_updates_and_deletes(user_client, posts):
+    Post.objects.filter(pk=posts["other"].pk).update(title="Прогулка в дождь")
+    posts["title"].delete()
+    _, ids = found(user_client, "прогулка")
+    assert ids == [posts["other"].id, posts["text"].id]
+
+
+def test_query_syntax_is_not_passed_to_fts(user_client, posts):
+    _, ids = found(user_client, 'обед" ^(*:')
+    assert ids == [posts["text"].id]
+    assert found(user_client, "   ")[1] == []
+
+
+def test_rebuild_command(user_client, posts):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO blog_post_fts (blog_post_fts) VALUES ('delete-all')")
+    assert found(user_client, "обед")[1] == []
+    call_command("rebuild_search_index", stdout=StringIO())
+    assert found(user_client, "обед")[1] == [posts["text"].id]
+
+
+def test_fallback_without_fts(user_client, posts, monkeypatch):
+    monkeypatch.setattr(search, "fts_available", lambda: False)
+    response, ids = found(user_client, "дом")
+    assert ids == [posts["other"].id]
+    assert "Сидели <mark>дом</mark>а." in response.content.decode()
+
+
+def test_pagination_keeps_query(user_client, mixer, posts):
+    mixer.cycle(12).blend(
+        "blog.Post", title="Прогулка", author=posts["title"].author,
+        category=posts["title"].category, is_published=True,
+        pub_date=timezone.now() - timedelta(days=2))
+    response, ids = found(user_client, "прогулка", page=2)
+    assert len(ids) == 4
+    assert "?q=%D0%BF%D1%80%D0%BE%D0%B3%D1%83%D0%BB%D0%BA%D0%B0&amp;page=1" in (
+        response.content.decode())
+
+
+def test_hidden_posts_do_not_use_up_candidates(
+        user_client, posts, monkeypatch):
+    # Скрытый и отложенный посты — самые новые совпадения.
+    monkeypatch.setattr("blog.search.SEARCH_CANDIDATES", 2)
+    monkeypatch.setattr("blog.views.SEARCH_CANDIDATES", 2)
+    response, ids = found(user_client, "прогулк")
+    assert ids == [posts["title"].id, posts["text"].id]
+    # Совпадений ровно столько, сколько ранжируется: ничего не отброшено.
+    assert "самых свежих совпадений" not in response.content.decode()
+
+    monkeypatch.setattr("blog.search.SEARCH_CANDIDATES", 1)
+    monkeypatch.setattr("blog.views.SEARCH_CANDIDATES", 1)
+    with override_settings(QUERY_BUDGET_RAISE=True):
+        response, ids = found(user_client, "прогулк")
+    assert len(ids) == 1
+    assert "Показаны лучшие из 1 самых свежих совпадений" in (
+        response.content.decode())
+
+    response, _ = found(user_client, "дождь")
+    assert "самых свежих совпадений" not in response.content.decode()
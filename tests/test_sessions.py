@@ -0,0 +1,93 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import lookups
+from blog.utils import get_publication_boundary
+
+pytestmark = [pytest.mark.django_db]
+
+ENGINES = {
+    "db": "django.contrib.sessions.backends.db",
+    "cached_db": "django.contrib.sessions.backends.cached_db",
+    "signed_cookies": "django.contrib.sessions.backends.signed_cookies",
+}
+
+
+def index_queries(user, engine):
+    with override_settings(SESSION_ENGINE=engine):
+        client = Client()
+        client.force_login(user)
+        # Справочники и даты для ETag уже в кэше, как в работающем процессе.
+        assert client.get(reverse("blog:index")).status_code == 200
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse("blog:index"))
+        assert response.status_code == 200
+        assert response.wsgi_request.user == user
+    return [query["sql"] for query in queries.captured_queries]
+
+
+def test_cached_and_signed_sessions_save_a_query_on_index(
+        user, post_with_published_location):
+    lookups.get_tables()
+    get_publication_boundary()
+    queries = {
+        name: index_queries(user, engine) for name, engine in ENGINES.items()
+    }
+    assert any("django_session" in sql for sql in queries["db"])
+    for name in ("cached_db", "signed_cookies"):
+        assert len(queries[name]) == len(queries["db"]) - 1, name
+        assert not any("django_session" in sql for sql in queries[name])
+
+
+def test_anonymous_readers_get_no_session(client, post_with_published_location):
+    response = client.get(reverse("blog:index"))
+    assert response.status_code == 200
+    assert "sessionid" not in response.cookies
+    assert not Session.objects.exists()
+
+
+def test_cached_db_logout_ends_session(user, post_with_published_location):
+    with override_settings(SESSION_ENGINE=ENGINES["cached_db"]):
+        client = Client()
+        client.force_login(user)
+        client.get(reverse("logout"))
+        response = client.get(reverse("blog:index"))
+    assert not response.wsgi_request.user.is_authenticated
+    assert not Session.objects.exists()
+
+
+def test_worker_clears_expired_sessions(user):
+    now = timezone.now()
+    Session.objects.create(
+        session_key="expired", session_data="",
+        expire_date=now - timedelta(days=1))
+    Session.objects.create(
+        session_key="alive", session_data="",
+        expire_date=now + timedelta(days=1))
+    call_command("run_tasks", "--once", "--threads=1", stdout=StringIO())
+    assert list(
+        Session.objects.values_list("session_key", flat=True)) == ["alive"]
+
+
+def test_worker_clears_sessions_while_queue_is_busy(user):
+    Session.objects.create(
+        session_key="expired", session_data="",
+        expire_date=timezone.now() - timedelta(days=1))
+    # Очередь так и не пустеет: рабочий останавливают посреди нагрузки.
+    batches = mock.Mock(side_effect=[[1], [2], KeyboardInterrupt])
+    with mock.patch(
+            "tasks.management.commands.run_tasks.due_jobs", batches), \
+            mock.patch("tasks.management.commands.run_tasks.run_job"):
+        with pytest.raises(KeyboardInterrupt):
+            call_command("run_tasks", "--threads=1", stdout=StringIO())
+    assert not Session.objects.exists()
@@ -0,0 +1,66 @@
+import pytest
+from django.db import OperationalError, connection, transaction
+from django.test import override_settings
+
+from blog.db import retry_on_locked
+from blog.models import Category
+
+
+def test_pragmas_applied_to_new_connections(django_db_blocker):
+    with django_db_blocker.unblock():
+        connection.close()
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            assert cursor.fetchone()[0] == 20000
+            cursor.execute("PRAGMA synchronous")
+            assert cursor.fetchone()[0] == 1, "ожидался synchronous=NORMAL"
+            cursor.execute("PRAGMA temp_store")
+            assert cursor.fetchone()[0] == 2
+
+
+def flaky_write(failures, message="database is locked"):
+    calls = []
+
+    @retry_on_locked
+    def write():
+        calls.append(1)
+        Category.objects.create(slug=f"attempt-{len(calls)}")
+        if len(calls) <= failures:
+            raise OperationalError(message)
+        return "ok"
+
+    return write, calls
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(SQLITE_LOCK_RETRY_DELAY=0)
+def test_locked_write_is_retried():
+    write, calls = flaky_write(failures=2)
+    assert write() == "ok"
+    assert len(calls) == 3
+    # Записи неудачных попыток откатились вместе с ними.
+    assert list(Category.objects.values_list("slug", flat=True)) == [
+        "attempt-3"]
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(SQLITE_LOCK_RETRY_DELAY=0, SQLITE_LOCK_RETRIES=1)
+def test_retry_gives_up_and_ignores_other_errors():
+    write, calls = flaky_write(failures=5)
+    with pytest.raises(OperationalError):
+        write()
+    assert len(calls) == 2
+
+    write, calls = flaky_write(failures=1, message="no such table: x")
+    with pytest.raises(OperationalError):
+        write()
+    assert len(calls) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(SQLITE_LOCK_RETRY_DELAY=0)
+def test_no_retry_inside_outer_transaction():
+    write, calls = flaky_write(failures=1)
+    with pytest.raises(OperationalError), transaction.atomic():
+        write()
+    assert len(calls) == 1
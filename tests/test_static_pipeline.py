@@ -0,0 +1,128 @@
+import gzip
+import json
+import re
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+from django_bootstrap5.core import BOOTSTRAP5_DEFAULTS
+
+from blog.constants import STATIC_IMMUTABLE_MAX_AGE, STATIC_MAX_AGE
+from blog.css_purge import Purger
+from blog.staticfiles import CompressedManifestStaticFilesStorage
+
+BOOTSTRAP = "css/bootstrap.min.css"
+
+
+@pytest.fixture(scope="module")
+def static_root(tmp_path_factory):
+    root = tmp_path_factory.mktemp("static")
+    with override_settings(STATIC_ROOT=root):
+        call_command("collectstatic", interactive=False, verbosity=0)
+        yield root
+
+
+@pytest.fixture
+def manifest(static_root):
+    return json.loads(
+        (static_root / "staticfiles.json").read_text(encoding="utf-8")
+    )["paths"]
+
+
+def test_purger_keeps_rules_for_used_classes():
+    css = (
+        "/*! license */.used{a:1}.unused{b:2}.used,.unused .x{c:3}"
+        "a:not(.unused){d:4}@media (min-width:1px){.unused{e:5}}"
+        "@media print{.used{f:6}}@font-face{font-family:x}"
+        ".alert-info{g:7}[data-x=\".unused\"]{h:8}")
+    purged = Purger({"used"}, [r"^alert-"]).purge(css)
+    assert purged == (
+        "/*! license */.used{a:1}.used{c:3}a:not(.unused){d:4}"
+        "@media print{.used{f:6}}@font-face{font-family:x}"
+        ".alert-info{g:7}[data-x=\".unused\"]{h:8}")
+
+
+def minor_version(text):
+    return re.search(r"(\d+\.\d+)\.\d+", text).group(1)
+
+
+def test_bundled_bootstrap_matches_django_bootstrap5():
+    header = open(finders.find(BOOTSTRAP), encoding="utf-8").read(200)
+    assert minor_version(header) == minor_version(
+        BOOTSTRAP5_DEFAULTS["css_url"]["url"])
+
+
+def test_missing_manifest_falls_back_only_when_allowed(tmp_path):
+    storage = CompressedManifestStaticFilesStorage(location=tmp_path)
+    with override_settings(STATIC_MANIFEST_FALLBACK=True):
+        assert storage.stored_name(BOOTSTRAP) == BOOTSTRAP
+    with override_settings(STATIC_MANIFEST_FALLBACK=False):
+        with pytest.raises(ValueError, match="manifest"):
+            storage.stored_name(BOOTSTRAP)
+
+
+def test_collectstatic_hashes_purges_and_compresses(static_root, manifest):
+    hashed = manifest[BOOTSTRAP]
+    assert hashed != BOOTSTRAP
+    css = (static_root / hashed).read_bytes()
+    source = open(finders.find(BOOTSTRAP), "rb").read()
+    assert len(css) < len(source) / 2
+    assert b".navbar{" in css and b".page-link{" in css
+    assert b".carousel" not in css
+    assert gzip.decompress(
+        (static_root / (hashed + ".gz")).read_bytes()) == css
+
+
+@pytest.mark.django_db
+def test_pages_link_hashed_assets(client, static_root, manifest):
+    content = client.get(reverse("blog:index")).content.decode()
+    assert f'href="{settings.STATIC_URL}{manifest[BOOTSTRAP]}"' in content
+    assert "cdn.jsdelivr.net" not in content
+
+
+@pytest.mark.django_db
+def test_middleware_serves_collected_files(static_root, manifest):
+    with override_settings(SERVE_STATIC=True):
+        client = Client()
+        hashed_url = settings.STATIC_URL + manifest[BOOTSTRAP]
+        response = client.get(hashed_url, HTTP_ACCEPT_ENCODING="gzip")
+        assert response.status_code == 200
+        assert response["Content-Type"] == "text/css"
+        assert response["Content-Encoding"] == "gzip"
+        assert response["Vary"] == "Accept-Encoding"
+        assert response["Cache-Control"] == (
+            f"public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable")
+        assert b"".join(response.streaming_content) == (
+            static_root / (manifest[BOOTSTRAP] + ".gz")).read_bytes()
+
+        plain = client.get(settings.STATIC_URL + BOOTSTRAP)
+        assert "Content-Encoding" not in plain
+        assert plain["Cache-Control"] == f"public, max-age={STATIC_MAX_AGE}"
+
+        not_modified = client.get(
+            hashed_url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        assert not_modified.status_code == 304
+        stale = client.get(hashed_url, HTTP_IF_MODIFIED_SINCE=http_date(0))
+        assert stale.status_code == 200
+
+        for missing in ("css/missing.css", "../staticfiles.json/../../x"):
+            assert client.get(
+                settings.STATIC_URL + missing).status_code == 404
+
+
+def test_middleware_is_off_by_default(static_root, manifest):
+    response = Client().get(settings.STATIC_URL + manifest[BOOTSTRAP])
+    assert response.status_code == 404
+
+
+def test_purge_css_command(tmp_path):
+    out = StringIO()
+    call_command("purge_css", output_dir=str(tmp_path), stdout=out)
+    assert BOOTSTRAP in out.getvalue()
+    purged = (tmp_path / BOOTSTRAP).read_text(encoding="utf-8")
+    assert ".navbar{" in purged and ".carousel" not in purged
@@ -0,0 +1,91 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from tasks.models import Job
+from tasks.queue import claim, requeue_stale, run_job, task
+
+pytestmark = [pytest.mark.django_db]
+
+calls = []
+
+
+@task(name="tests.record", max_attempts=2)
+def record(value):
+    calls.append(value)
+
+
+@task(name="tests.flaky", max_attempts=2)
+def flaky():
+    raise RuntimeError("boom")
+
+
+@pytest.fixture(autouse=True)
+def queued_only():
+    calls.clear()
+    with override_settings(TASKS_EAGER=False, TASKS_RUN_IN_PROCESS=False):
+        yield
+
+
+def test_job_runs_once():
+    job = record.delay("a")
+    assert Job.objects.get(pk=job.pk).status == Job.Status.PENDING
+    run_job(job.pk)
+    run_job(job.pk)
+    assert calls == ["a"]
+    assert Job.objects.get(pk=job.pk).status == Job.Status.DONE
+
+
+def test_failed_job_is_retried_with_backoff_then_failed():
+    job = flaky.delay()
+    delay = run_job(job.pk)
+    job.refresh_from_db()
+    assert delay == 5
+    assert job.status == Job.Status.PENDING
+    assert job.run_after > timezone.now()
+    assert "boom" in job.last_error
+    assert not claim(job.pk), "повтор не должен начаться раньше срока"
+
+    Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+    assert run_job(job.pk) is None
+    job.refresh_from_db()
+    assert (job.status, job.attempts) == (Job.Status.FAILED, 2)
+
+
+def test_stale_running_job_is_requeued():
+    job = record.delay("b")
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.Status.RUNNING,
+        started_at=timezone.now() - timedelta(hours=1),
+    )
+    assert requeue_stale() == 1
+    run_job(job.pk)
+    assert calls == ["b"]
+
+
+def test_worker_command_drains_queue():
+    for value in "xyz":
+        record.delay(value)
+    call_command("run_tasks", "--once", "--threads=1", stdout=StringIO())
+    assert sorted(calls) == ["x", "y", "z"]
+    assert not Job.objects.exclude(status=Job.Status.DONE).exists()
+
+
+@override_settings(
+    EMAIL_BACKEND="tasks.backends.QueuedEmailBackend",
+    TASKS_EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+)
+def test_emails_are_sent_by_worker():
+    message = EmailMultiAlternatives("Тема", "Текст", to=["a@example.com"])
+    message.attach_alternative("<p>Текст</p>", "text/html")
+    message.send()
+    assert mail.outbox == []
+    call_command("run_tasks", "--once", "--threads=1", stdout=StringIO())
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].alternatives == [("<p>Текст</p>", "text/html")]
@@ -0,0 +1,77 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.paginator import Paginator
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loader_tags import IncludeNode
+from django.test import RequestFactory, override_settings
+from django.urls import resolve
+
+from blog.management.commands.bench_templates import (
+    PROFILES, make_backend, make_posts)
+from blog.template_loaders import precompile_templates
+
+
+def locmem_backend(templates, inline):
+    loaders = [("django.template.loaders.locmem.Loader", templates)]
+    if inline:
+        loaders = [("blog.template_loaders.InliningLoader", loaders)]
+    return DjangoTemplates({
+        "NAME": f"locmem-{inline}", "DIRS": [], "APP_DIRS": False,
+        "OPTIONS": {"loaders": loaders},
+    })
+
+
+def include_nodes(backend, name):
+    return backend.get_template(name).template.nodelist.get_nodes_by_type(
+        IncludeNode)
+
+
+def test_static_includes_are_inlined():
+    backend = make_backend("production", PROFILES["production"])
+    assert not include_nodes(backend, "blog/index.html")
+    assert not include_nodes(backend, "base.html")
+    plain = make_backend("uncached", PROFILES["uncached"])
+    assert include_nodes(plain, "blog/index.html")
+
+
+def test_inlined_index_renders_the_same():
+    request = RequestFactory().get("/")
+    request.user = AnonymousUser()
+    request.resolver_match = resolve("/")
+    page = Paginator(make_posts(10), 10).page(1)
+    rendered = []
+    for profile in ("uncached", "production"):
+        caches["post_cards"].clear()
+        rendered.append(make_backend(profile, PROFILES[profile]).get_template(
+            "blog/index.html").render({"page_obj": page}, request))
+    assert rendered[0] == rendered[1]
+
+
+def test_only_safe_includes_are_inlined():
+    inlining = locmem_backend({
+        "page": (
+            '{% include "part" with x=1 %}|{% include "part" with x=2 only %}'
+            '|{% include name %}|{% include "layout" %}|{% include "loop" %}'),
+        "part": "[{{ x }}{{ y }}]",
+        "layout": "{% block body %}layout{% endblock %}",
+        "loop": (
+            "{% if stop %}end{% else %}"
+            "{% include 'loop' with stop=1 %}{% endif %}"),
+    }, inline=True)
+    # Остались include с only, с переменной, с block и рекурсивный.
+    assert len(include_nodes(inlining, "page")) == 4
+    assert inlining.get_template("page").render(
+        {"name": "part", "x": 0, "y": "y"}) == "[1y]|[2]|[0y]|layout|end"
+
+
+@override_settings(TEMPLATES=[{
+    "BACKEND": "django.template.backends.django.DjangoTemplates",
+    "DIRS": make_backend("p", PROFILES["production"]).engine.dirs,
+    "OPTIONS": {"loaders": PROFILES["production"]},
+}])
+def test_precompile_fills_template_cache():
+    assert precompile_templates() > 20
+    cached_loader = engines["django"].engine.template_loaders[0]
+    assert "blog/index.html" in cached_loader.get_template_cache